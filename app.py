@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, g, has_app_context, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
@@ -9,8 +9,6 @@ import pytz
 import sys
 import csv
 import io
-import requests
-from PIL import Image
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -18,6 +16,24 @@ from email.mime.base import MIMEBase
 from email import encoders
 import base64
 import json
+import threading
+import time
+import click
+from config import SecurityConfig
+from db_pool import ConnectionPool, PoolTimeoutError
+from history_archive import archive_history, history_source
+from listing_cache import ListingCache
+from image_utils import RENDITIONS, build_renditions, compress_image_with_renditions, open_for_resize, to_rgb
+from photo_jobs import PhotoJobQueue, QueueFullError, detach_upload
+from storage_client import StorageClient
+from part_search import SORT_OPTIONS, fetch_parts_by_ids, fetch_parts_page, search_part_ids, sort_cursor_values
+from hangul_index import HangulIndex, has_hangul
+from export_stream import ServerCursor, format_cell, stream_csv, stream_xlsx, xlsx_available
+from inventory_import import (ImportFileError, MAX_REPORTED_ERRORS, apply_import, read_import_rows,
+                              validate_import_rows)
+from change_notifier import CHANNEL as CHANGE_CHANNEL, ChangeListener, publish_change, process_origin
+from migrations import (apply_migrations, check_indexes, count_unassigned_receipts, get_schema_version,
+                        latest_version, pending_migrations, EXPECTED_INDEXES)
 
 
 app = Flask(__name__)
@@ -40,6 +56,39 @@ DATABASE_URL = os.environ.get('SUPABASE_DB_URL')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'Onsn1103813!')
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
+# Supabase Storage 호출 설정 (워커 프로세스마다 적용)
+STORAGE_POOL_SIZE = int(os.environ.get('STORAGE_POOL_SIZE', 10))
+STORAGE_CONNECT_TIMEOUT = float(os.environ.get('STORAGE_CONNECT_TIMEOUT', 3.05))  # 초
+STORAGE_READ_TIMEOUT = float(os.environ.get('STORAGE_READ_TIMEOUT', 30))  # 초
+STORAGE_RETRIES = int(os.environ.get('STORAGE_RETRIES', 3))
+# 시작 시 스키마가 뒤처져 있으면 자동으로 마이그레이션 적용 (0이면 경고만 출력)
+AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', '1') != '0'
+
+# 연결 풀 설정 (워커 프로세스마다 적용)
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_IDLE_TIMEOUT = int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))  # 초
+DB_POOL_MAX_USES = int(os.environ.get('DB_POOL_MAX_USES', 1000))
+DB_POOL_HEALTH_CHECK_INTERVAL = int(os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30))  # 초
+DB_POOL_ACQUIRE_TIMEOUT = int(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', 10))  # 초
+
+# 재고 목록 캐시 (TTL 0이면 캐시 사용 안 함)
+LISTING_CACHE_TTL = int(os.environ.get('LISTING_CACHE_TTL', 30))  # 초
+LISTING_CACHE_MAX_ENTRIES = int(os.environ.get('LISTING_CACHE_MAX_ENTRIES', 64))
+
+# 워커 간 캐시 동기화 (LISTEN/NOTIFY, 0이면 사용 안 함)
+CACHE_SYNC_ENABLED = os.environ.get('CACHE_SYNC', '1') != '0'
+CACHE_SYNC_POLL_INTERVAL = float(os.environ.get('CACHE_SYNC_POLL_INTERVAL', 1.0))  # 초
+
+# 사진 업로드 백그라운드 처리 (워커 프로세스마다 적용)
+PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 2))
+PHOTO_QUEUE_SIZE = int(os.environ.get('PHOTO_QUEUE_SIZE', 20))
+PHOTO_JOB_TIMEOUT = int(os.environ.get('PHOTO_JOB_TIMEOUT', 600))  # 초, 이 시간 동안 진행이 없으면 중단된 것으로 표시
+PHOTO_JOB_RETENTION_DAYS = 7
+
+# 재고 이력 아카이브 (0이면 앱 내부 스케줄러 미사용, cron으로 'flask --app app history archive' 실행)
+HISTORY_ARCHIVE_INTERVAL_HOURS = float(os.environ.get('HISTORY_ARCHIVE_INTERVAL_HOURS', 0))
+HISTORY_ARCHIVE_BATCH_SIZE = int(os.environ.get('HISTORY_ARCHIVE_BATCH_SIZE', 1000))
 
 # 이메일 설정 (환경변수에서 가져오기)
 SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
@@ -71,6 +120,19 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 # 올바른 창고 목록
 WAREHOUSES = ['보라매창고', '관악창고', '양천창고', '강남창고', '강동창고']
 
+# 일괄 수량 변경 최대 품목 수
+MAX_BATCH_ITEMS = 200
+
+# 인수증 이력 한 페이지당 건수
+RECEIPTS_PER_PAGE = 20
+
+# 재고 이력 한 페이지당 건수
+HISTORY_PER_PAGE = 50
+SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 1000))  # 검색어 일치 결과 최대 개수
+SEARCH_PER_PAGE = 50
+PART_SUGGEST_LIMIT = 10      # 자동완성 기본 개수
+PART_SUGGEST_MAX_LIMIT = 20  # 자동완성 최대 개수
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -78,8 +140,55 @@ def get_korea_time():
     korea_tz = pytz.timezone('Asia/Seoul')
     return datetime.now(korea_tz)
 
-def get_db_connection():
-    """안정적인 데이터베이스 연결 함수"""
+def get_history_cutoff():
+    """이력 보관 기준 시각 (이보다 오래된 이력은 아카이브 대상, 한국시간 naive datetime)"""
+    return get_korea_time().replace(tzinfo=None) - timedelta(days=SecurityConfig.HISTORY_RETENTION_DAYS)
+
+def encode_page_cursor(values):
+    """키셋 페이지네이션 커서 생성 (정렬 키 값 목록 → URL 안전 문자열)"""
+    serializable = [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]
+    raw = json.dumps(serializable, ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token):
+    """커서 문자열 → 정렬 키 값 목록 (잘못된 커서는 None)"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return values if isinstance(values, list) else None
+    except (ValueError, TypeError):
+        return None
+
+def parse_date_param(value):
+    """YYYY-MM-DD 형식 쿼리 파라미터 파싱 (잘못된 값은 None)"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def estimate_row_count(conn, sql, params):
+    """COUNT(*) 없이 실행 계획의 예상 행 수로 대략적인 건수 추정 (실패 시 None)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        # 읽기 전용 조회 중이므로 롤백해도 앞서 가져온 결과에는 영향 없음
+        conn.rollback()
+        print(f"⚠️ 건수 추정 실패: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def create_db_connection():
+    """새 pg8000 연결 생성 (연결 풀 전용)"""
     try:
         import pg8000
         parsed = urllib.parse.urlparse(DATABASE_URL)
@@ -103,6 +212,47 @@ def get_db_connection():
         print(f"   오류 내용: {e}")
         raise Exception(f"Supabase 연결 실패: {e}")
 
+db_pool = ConnectionPool(
+    create_db_connection,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    max_uses=DB_POOL_MAX_USES,
+    health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT
+)
+
+listing_cache = ListingCache(max_entries=LISTING_CACHE_MAX_ENTRIES, ttl=LISTING_CACHE_TTL)
+
+storage_client = StorageClient(
+    SUPABASE_URL,
+    SUPABASE_SERVICE_KEY,
+    pool_size=STORAGE_POOL_SIZE,
+    connect_timeout=STORAGE_CONNECT_TIMEOUT,
+    read_timeout=STORAGE_READ_TIMEOUT,
+    retries=STORAGE_RETRIES
+)
+
+def get_db_connection():
+    """연결 풀에서 데이터베이스 연결을 빌려오는 함수 (conn.close() 시 풀에 반납)"""
+    try:
+        conn = db_pool.acquire()
+    except PoolTimeoutError as e:
+        print(f"❌ 연결 풀 고갈: {e}")
+        raise Exception(f"데이터베이스 연결 대기 시간 초과: {e}")
+    
+    # 요청 중 예외로 close()가 누락되어도 요청 종료 시 반납되도록 기록
+    if has_app_context():
+        g.setdefault('_db_connections', []).append(conn)
+    
+    return conn
+
+@app.teardown_appcontext
+def release_db_connections(exception):
+    """요청 종료 시 반납되지 않은 연결을 풀에 반납"""
+    for conn in g.pop('_db_connections', []):
+        conn.close()
+
 def send_email(to_emails, subject, html_content):
     """이메일 발송 함수"""
     try:
@@ -131,81 +281,6 @@ def send_email(to_emails, subject, html_content):
         print(f"이메일 발송 오류: {e}")
         return False, f"이메일 발송 실패: {str(e)}"
 
-def compress_image_to_target_size(image_file, max_size_mb=1, max_width=800, quality=85):
-    """
-    이미지를 목표 크기(MB) 이하로 압축하는 함수
-    
-    Args:
-        image_file: 업로드된 이미지 파일
-        max_size_mb: 최대 파일 크기 (MB)
-        max_width: 최대 가로 크기 (픽셀)
-        quality: JPEG 품질 (20-95)
-    
-    Returns:
-        compressed_image_bytes: 압축된 이미지 바이트
-        final_size_kb: 최종 파일 크기 (KB)
-    """
-    try:
-        # PIL Image로 열기
-        img = Image.open(image_file)
-        
-        # EXIF 회전 정보 처리 (스마트폰 사진)
-        if hasattr(img, '_getexif') and img._getexif() is not None:
-            exif = img._getexif()
-            orientation = exif.get(274)
-            if orientation == 3:
-                img = img.rotate(180, expand=True)
-            elif orientation == 6:
-                img = img.rotate(270, expand=True)
-            elif orientation == 8:
-                img = img.rotate(90, expand=True)
-        
-        # RGB 모드로 변환 (JPEG 저장용)
-        if img.mode in ('RGBA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # 원본 크기 계산
-        original_width, original_height = img.size
-        
-        # 크기 조정 (비율 유지)
-        if original_width > max_width:
-            ratio = max_width / original_width
-            new_height = int(original_height * ratio)
-            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-        
-        # 목표 크기까지 품질 조정하면서 압축
-        max_size_bytes = max_size_mb * 1024 * 1024
-        current_quality = quality
-        
-        while current_quality > 20:
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=current_quality, optimize=True)
-            
-            if output.tell() <= max_size_bytes:
-                break
-                
-            current_quality -= 5
-            output.seek(0)
-            output.truncate(0)
-        
-        output.seek(0)
-        compressed_bytes = output.getvalue()
-        final_size_kb = len(compressed_bytes) / 1024
-        
-        print(f"✅ 이미지 압축 완료: {final_size_kb:.1f}KB (품질: {current_quality})")
-        
-        return compressed_bytes, final_size_kb
-        
-    except Exception as e:
-        print(f"❌ 이미지 압축 오류: {e}")
-        return None, 0
-
 def upload_to_supabase_storage(image_bytes, filename, bucket_name='warehouse-photos'):
     """
     압축된 이미지를 Supabase Storage에 업로드
@@ -219,20 +294,12 @@ def upload_to_supabase_storage(image_bytes, filename, bucket_name='warehouse-pho
         public_url: 업로드된 파일의 공개 URL
     """
     try:
-        # Supabase Storage API 엔드포인트
-        upload_url = f"{SUPABASE_URL}/storage/v1/object/{bucket_name}/{filename}"
-        
-        headers = {
-            'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-            'Content-Type': 'image/jpeg'
-        }
-        
-        # 파일 업로드
-        response = requests.post(upload_url, data=image_bytes, headers=headers)
+        # 파일 업로드 (공유 세션으로 연결 재사용, 5xx/연결 오류는 재시도)
+        response = storage_client.upload(bucket_name, filename, image_bytes)
         
         if response.status_code in [200, 201]:
             # 공개 URL 생성
-            public_url = f"{SUPABASE_URL}/storage/v1/object/public/{bucket_name}/{filename}"
+            public_url = storage_client.public_url(bucket_name, filename)
             print(f"✅ Supabase Storage 업로드 성공: {public_url}")
             return public_url
         else:
@@ -243,114 +310,112 @@ def upload_to_supabase_storage(image_bytes, filename, bucket_name='warehouse-pho
         print(f"❌ Supabase Storage 업로드 오류: {e}")
         return None
 
+def photo_rendition_filename(filename, rendition):
+    """사진 사본 파일명 (예: abc_123.jpg -> abc_123_thumb.jpg)"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{rendition}{ext or '.jpg'}"
+
+def photo_storage_filenames(filename, thumbnail_url=None, medium_url=None):
+    """사진 한 장이 Storage에 차지하는 파일명 목록 (원본 + 생성된 사본, 원본을 가리키는 사본 URL은 제외)"""
+    filenames = [filename]
+    for rendition, url in (('thumb', thumbnail_url), ('medium', medium_url)):
+        rendition_filename = photo_rendition_filename(filename, rendition)
+        if url and url.endswith('/' + rendition_filename):
+            filenames.append(rendition_filename)
+    return filenames
+
+def upload_photo_renditions(filename, rendition_images, original_url):
+    """
+    사진 사본 업로드
+
+    원본이 사본 크기 이하라 만들지 않은 사본은 원본 URL을 사용하고,
+    업로드에 실패한 사본은 빠지므로 (화면에서는 원본으로 대체) 로그를 남깁니다.
+
+    Returns:
+        {사본 이름: 공개 URL}
+    """
+    urls = {}
+    failed = []
+    for rendition in RENDITIONS:
+        if rendition not in rendition_images:
+            urls[rendition] = original_url
+            continue
+        image_bytes, _ = rendition_images[rendition]
+        url = upload_to_supabase_storage(image_bytes, photo_rendition_filename(filename, rendition))
+        if url:
+            urls[rendition] = url
+        else:
+            failed.append(rendition)
+    if failed:
+        print(f"⚠️ 사진 사본 일부 업로드 실패 ({filename}): {', '.join(failed)} - 갤러리에서는 원본으로 표시")
+    return urls
+
+def delete_from_supabase_storage(filenames, bucket_name='warehouse-photos'):
+    """
+    Supabase Storage 파일 일괄 삭제 (요청 1회)
+
+    Returns:
+        성공 여부
+    """
+    if not filenames:
+        return True
+    response = storage_client.delete(bucket_name, filenames)
+    if response.status_code != 200:
+        print(f"❌ Supabase Storage 삭제 실패: {response.status_code} - {response.text}")
+        return False
+    print(f"✅ Supabase Storage에서 파일 {len(filenames)}개 삭제")
+    return True
+
+def ensure_admin_account(conn):
+    """관리자 계정이 없으면 생성"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT id FROM users WHERE employee_id = %s', ('admin',))
+        admin_exists = cursor.fetchone()
+        
+        if not admin_exists:
+            admin_password_hash = generate_password_hash(ADMIN_PASSWORD)
+            cursor.execute('''INSERT INTO users (name, employee_id, team, password, is_approved) 
+                             VALUES (%s, %s, %s, %s, %s)''',
+                          ('관리자', 'admin', '관리', admin_password_hash, 1))
+            conn.commit()
+            print("✅ 관리자 계정 생성 완료")
+        else:
+            conn.commit()
+            print("ℹ️ 관리자 계정 이미 존재")
+    except Exception as admin_error:
+        conn.rollback()
+        print(f"⚠️ 관리자 계정 처리 중 오류: {admin_error}")
+    finally:
+        cursor.close()
+
+def upgrade_database(conn):
+    """대기 중인 마이그레이션 적용 후 관리자 계정 확인"""
+    applied = apply_migrations(conn)
+    ensure_admin_account(conn)
+    return applied
+
 def init_db():
-    """트랜잭션 오류 완전 해결된 초기화 함수"""
+    """시작 시 스키마 버전만 확인 (DDL은 마이그레이션에서 한 번만 실행)"""
     conn = None
     try:
-        print("🔄 Supabase PostgreSQL 연결 테스트 중...")
         conn = get_db_connection()
-        cursor = conn.cursor()
+        current_version = get_schema_version(conn)
+        target_version = latest_version()
+        print(f"✅ Supabase 연결 성공! (스키마 버전 {current_version}/{target_version})")
         
-        cursor.execute('SELECT version()')
-        version_info = cursor.fetchone()[0]
-        print(f"✅ Supabase 연결 성공!")
-        print(f"📊 PostgreSQL 버전: {version_info[:50]}...")
-        
-        print("🔄 데이터베이스 테이블 생성 중...")
-        
-        # 각 테이블을 개별 트랜잭션으로 생성
-        tables_to_create = [
-            ('users', '''CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                employee_id TEXT UNIQUE NOT NULL,
-                team TEXT NOT NULL,
-                password TEXT NOT NULL,
-                is_approved INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
-            )'''),
-            ('inventory', '''CREATE TABLE IF NOT EXISTS inventory (
-                id SERIAL PRIMARY KEY,
-                warehouse TEXT NOT NULL,
-                category TEXT NOT NULL,
-                part_name TEXT NOT NULL,
-                quantity INTEGER DEFAULT 0,
-                last_modifier TEXT,
-                last_modified TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
-            )'''),
-            ('inventory_history', '''CREATE TABLE IF NOT EXISTS inventory_history (
-                id SERIAL PRIMARY KEY,
-                inventory_id INTEGER REFERENCES inventory(id),
-                change_type TEXT,
-                quantity_change INTEGER,
-                modifier_name TEXT,
-                modified_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
-            )'''),
-            ('photos', '''CREATE TABLE IF NOT EXISTS photos (
-                id SERIAL PRIMARY KEY,
-                inventory_id INTEGER REFERENCES inventory(id),
-                filename TEXT NOT NULL,
-                original_name TEXT NOT NULL,
-                file_size INTEGER,
-                uploaded_by TEXT,
-                uploaded_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul'),
-                supabase_url TEXT
-            )'''),
-            ('delivery_receipts', '''CREATE TABLE IF NOT EXISTS delivery_receipts (
-                id SERIAL PRIMARY KEY,
-                receipt_date DATE NOT NULL,
-                receipt_type TEXT NOT NULL,
-                items_data TEXT,
-                signature_data TEXT,
-                created_by TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
-            )''')
-        ]
-        
-        for table_name, sql in tables_to_create:
-            try:
-                cursor.execute(sql)
-                conn.commit()
-                print(f"✅ {table_name} 테이블 처리 완료")
-            except Exception as e:
-                conn.rollback()
-                print(f"⚠️ {table_name} 테이블 처리 중 오류 (무시): {e}")
-                cursor.close()
-                cursor = conn.cursor()
+        if current_version >= target_version:
+            return
         
-        # supabase_url 컬럼 추가 (이미 존재할 수 있으므로 오류 무시)
-        try:
-            cursor.execute('ALTER TABLE photos ADD COLUMN supabase_url TEXT')
-            conn.commit()
-            print("✅ photos 테이블에 supabase_url 컬럼 추가 완료")
-        except Exception as e:
-            conn.rollback()
-            print(f"ℹ️ supabase_url 컬럼 이미 존재 또는 추가 불필요: {e}")
-            cursor.close()
-            cursor = conn.cursor()
+        if not AUTO_MIGRATE:
+            print(f"⚠️ 적용되지 않은 마이그레이션 {len(pending_migrations(current_version))}개가 있습니다.")
+            print("   'flask --app app db upgrade' 명령으로 적용하세요.")
+            return
+        
+        print("🔄 데이터베이스 마이그레이션 적용 중...")
+        upgrade_database(conn)
         
-        # 관리자 계정 생성 (별도 트랜잭션)
-        try:
-            cursor.execute('SELECT id FROM users WHERE employee_id = %s', ('admin',))
-            admin_exists = cursor.fetchone()
-            
-            if not admin_exists:
-                admin_password_hash = generate_password_hash(ADMIN_PASSWORD)
-                cursor.execute('''INSERT INTO users (name, employee_id, team, password, is_approved) 
-                                 VALUES (%s, %s, %s, %s, %s)''',
-                              ('관리자', 'admin', '관리', admin_password_hash, 1))
-                conn.commit()
-                print("✅ 관리자 계정 생성 완료")
-            else:
-                print("ℹ️ 관리자 계정 이미 존재")
-                
-        except Exception as admin_error:
-            conn.rollback()
-            print(f"⚠️ 관리자 계정 처리 중 오류: {admin_error}")
-            
     except Exception as e:
-        if conn:
-            conn.rollback()
         print(f"❌ 초기화 중 오류: {e}")
         raise
     finally:
@@ -358,9 +423,200 @@ def init_db():
             conn.close()
         print("✅ 데이터베이스 초기화 완료!")
 
+def reconcile_photo_counts(conn):
+    """inventory.photo_count를 실제 photos 개수로 보정하고 보정된 행 수를 반환"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''UPDATE inventory i SET photo_count = COALESCE(c.cnt, 0)
+                          FROM inventory i2
+                          LEFT JOIN (SELECT inventory_id, COUNT(*) AS cnt FROM photos GROUP BY inventory_id) c
+                            ON c.inventory_id = i2.id
+                          WHERE i.id = i2.id AND i.photo_count <> COALESCE(c.cnt, 0)
+                          RETURNING i.id''')
+        fixed = len(cursor.fetchall())
+        conn.commit()
+        return fixed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def run_history_archive(max_batches=None):
+    """보관 기간이 지난 재고 이력을 아카이브로 이동 (다른 프로세스가 실행 중이면 None)"""
+    conn = get_db_connection()
+    try:
+        return archive_history(conn, get_history_cutoff(),
+                               batch_size=HISTORY_ARCHIVE_BATCH_SIZE, max_batches=max_batches)
+    finally:
+        conn.close()
+
+def _history_archive_scheduler():
+    """워커 내부 주기 실행 (advisory lock으로 한 워커만 실제 작업)"""
+    interval_seconds = HISTORY_ARCHIVE_INTERVAL_HOURS * 3600
+    while True:
+        time.sleep(interval_seconds)
+        try:
+            moved = run_history_archive()
+            if moved:
+                print(f"🗄️ 재고 이력 아카이브: {moved}건 이동")
+        except Exception as e:
+            print(f"⚠️ 재고 이력 아카이브 오류: {e}")
+
+_history_archive_lock = threading.Lock()
+_history_archive_pid = None
+
+@app.before_request
+def start_history_archive_scheduler():
+    """워커 프로세스별로 이력 아카이브 스케줄러 스레드 시작 (CLI 실행 시에는 시작하지 않음)"""
+    global _history_archive_pid
+    if HISTORY_ARCHIVE_INTERVAL_HOURS <= 0:
+        return
+    with _history_archive_lock:
+        # fork 이전에 시작한 스레드는 자식 프로세스에 없으므로 프로세스마다 새로 시작
+        if _history_archive_pid == os.getpid():
+            return
+        _history_archive_pid = os.getpid()
+        threading.Thread(target=_history_archive_scheduler, name='history-archive', daemon=True).start()
+    print(f"🗄️ 재고 이력 아카이브 스케줄러 시작 ({HISTORY_ARCHIVE_INTERVAL_HOURS}시간 간격, PID {os.getpid()})")
+
+# ========
+# CLI 명령 (flask --app app db ...)
+# ========
+@app.cli.group('db')
+def db_cli():
+    """데이터베이스 관리 명령"""
+
+@db_cli.command('upgrade')
+def db_upgrade_command():
+    """대기 중인 스키마 마이그레이션 적용"""
+    conn = get_db_connection()
+    try:
+        applied = upgrade_database(conn)
+        if applied:
+            click.echo(f"✅ 마이그레이션 {len(applied)}개 적용 완료 (현재 버전 {applied[-1][0]})")
+        else:
+            click.echo(f"ℹ️ 이미 최신 스키마입니다 (버전 {latest_version()})")
+    finally:
+        conn.close()
+
+@db_cli.command('status')
+def db_status_command():
+    """현재 스키마 버전과 대기 중인 마이그레이션 표시"""
+    conn = get_db_connection()
+    try:
+        current_version = get_schema_version(conn)
+        # delivery_receipts.warehouse 컬럼은 마이그레이션 3에서 추가됨
+        unassigned_receipts = count_unassigned_receipts(conn.cursor()) if current_version >= 3 else 0
+        conn.commit()
+    finally:
+        conn.close()
+    click.echo(f"현재 스키마 버전: {current_version} / 최신: {latest_version()}")
+    for version, description, _ in pending_migrations(current_version):
+        click.echo(f"  대기 중: {version} - {description}")
+    if unassigned_receipts:
+        click.echo(f"⚠️ 창고가 지정되지 않아 인수증 이력/내보내기에 표시되지 않는 인수증: {unassigned_receipts}건")
+        click.echo("   delivery_receipts.warehouse를 직접 지정해 주세요.")
+
+@db_cli.command('reconcile-photo-counts')
+def db_reconcile_photo_counts_command():
+    """inventory.photo_count를 photos 테이블 기준으로 재계산"""
+    conn = get_db_connection()
+    try:
+        fixed = reconcile_photo_counts(conn)
+    finally:
+        conn.close()
+    click.echo(f"✅ 사진 개수 보정 완료: {fixed}개 품목 수정")
+
+@app.cli.group('history')
+def history_cli():
+    """재고 이력 관리 명령"""
+
+@history_cli.command('archive')
+@click.option('--max-batches', type=int, default=None, help='최대 배치 수 (기본: 전부 이동)')
+def history_archive_command(max_batches):
+    """보관 기간(HISTORY_RETENTION_DAYS)이 지난 이력을 아카이브로 이동"""
+    moved = run_history_archive(max_batches=max_batches)
+    if moved is None:
+        click.echo("ℹ️ 다른 프로세스에서 아카이브 작업이 진행 중입니다.")
+    else:
+        click.echo(f"✅ {SecurityConfig.HISTORY_RETENTION_DAYS}일 이전 이력 {moved}건을 아카이브로 이동했습니다.")
+
+@db_cli.command('rebuild-summary')
+@click.option('--warehouse', default=None, help='특정 창고만 재계산')
+def db_rebuild_summary_command(warehouse):
+    """창고/카테고리별 재고 요약(inventory_summary) 재계산"""
+    conn = get_db_connection()
+    try:
+        rows = rebuild_inventory_summary(conn, warehouse)
+    finally:
+        conn.close()
+    click.echo(f"✅ 재고 요약 재계산 완료: {rows}개 창고/카테고리")
+
+@db_cli.command('check-indexes')
+def db_check_indexes_command():
+    """누락되었거나 사용되지 않는 인덱스 보고"""
+    conn = get_db_connection()
+    try:
+        report = check_indexes(conn)
+    finally:
+        conn.close()
+    
+    if report['missing']:
+        click.echo("❌ 누락된 인덱스:")
+        for name in report['missing']:
+            click.echo(f"  {name} ({EXPECTED_INDEXES[name]}) - 'flask --app app db upgrade' 필요")
+    else:
+        click.echo("✅ 필요한 인덱스가 모두 존재합니다.")
+    
+    if report['unused']:
+        click.echo("⚠️ 사용 기록이 없는 인덱스 (통계 초기화 이후 idx_scan = 0):")
+        for name, table, size in report['unused']:
+            click.echo(f"  {name} ({table}, {size})")
+
+@app.cli.group('photos')
+def photos_cli():
+    """사진 관리 명령"""
+
+@photos_cli.command('backfill-renditions')
+@click.option('--limit', type=int, default=None, help='최대 처리 사진 수 (기본: 전부)')
+def photos_backfill_renditions_command(limit):
+    """썸네일/중간 크기 사본이 없거나 일부만 있는 사진의 사본 생성"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''SELECT id, filename, supabase_url FROM photos
+                          WHERE supabase_url IS NOT NULL AND (thumbnail_url IS NULL OR medium_url IS NULL)
+                          ORDER BY id LIMIT %s''', (limit,))
+        photos = cursor.fetchall()
+        conn.commit()
+
+        done = 0
+        for photo_id, filename, supabase_url in photos:
+            try:
+                original_bytes = storage_client.download(supabase_url)
+                img = to_rgb(open_for_resize(io.BytesIO(original_bytes), 800))
+                # 사본보다 작은 사진은 원본 URL로 채워 다음 실행에서 다시 선택되지 않게 함
+                rendition_urls = upload_photo_renditions(filename, build_renditions(img), supabase_url)
+            except Exception as e:
+                click.echo(f"⚠️ 사진 {photo_id} 사본 생성 실패: {e}")
+                continue
+            if not rendition_urls:
+                continue
+            cursor.execute('''UPDATE photos SET thumbnail_url = COALESCE(%s, thumbnail_url),
+                                                medium_url = COALESCE(%s, medium_url)
+                              WHERE id = %s''',
+                           (rendition_urls.get('thumb'), rendition_urls.get('medium'), photo_id))
+            conn.commit()
+            done += 1
+    finally:
+        conn.close()
+    click.echo(f"✅ 사진 사본 생성 완료: {done}/{len(photos)}장")
+
 # 시스템 시작 시 Supabase 연결 필수 확인
 print("🔍 Supabase 연결 상태 확인 중...")
 init_db()
+db_pool.prewarm()
 print("=" * 60)
 print("✅ 시스템 준비 완료 - Supabase 연결됨")
 print("=" * 60)
@@ -532,25 +788,24 @@ def admin_dashboard():
         cursor.execute("SELECT id, name, employee_id, team, is_approved, created_at FROM users WHERE employee_id != %s ORDER BY created_at DESC", ('admin',))
         users = cursor.fetchall()
         
-        # 재고 통계 - 단순화
-        cursor.execute("SELECT COUNT(*) FROM inventory")
-        result = cursor.fetchone()
-        total_items = result[0] if result else 0
-        
-        cursor.execute("SELECT SUM(quantity) FROM inventory")
-        result = cursor.fetchone() 
-        total_quantity = result[0] if result and result[0] else 0
-        
-        cursor.execute("SELECT warehouse, COUNT(*) FROM inventory GROUP BY warehouse")
+        # 재고 통계 - 미리 집계된 요약 테이블에서 조회 (쌓인 변경분은 먼저 합산)
+        fold_inventory_summary(conn)
+        cursor.execute(f'''SELECT warehouse, SUM(item_count), SUM(total_quantity)
+                           FROM {INVENTORY_SUMMARY_SOURCE}
+                           GROUP BY warehouse''')
         warehouse_stats = cursor.fetchall()
         
         conn.close()
         
         # 안전한 데이터 구조
+        total_items = 0
+        total_quantity = 0
         warehouse_dict = {}
-        if warehouse_stats:
-            for stat in warehouse_stats:
-                warehouse_dict[stat[0]] = stat[1]
+        for warehouse_name, item_count, quantity_sum in warehouse_stats:
+            total_items += item_count or 0
+            total_quantity += quantity_sum or 0
+            if item_count:
+                warehouse_dict[warehouse_name] = item_count
         
         return render_template('admin_dashboard.html', 
                              users=users or [],
@@ -609,6 +864,114 @@ def admin_warehouse():
 # ========
 # NEW: Access 관리 관련 라우트들
 # ========
+def load_inventory_listing(warehouse_name, category):
+    """창고/카테고리별 화면용 재고 목록 (캐시 우선, 없으면 DB 조회 후 캐시에 저장)"""
+    cache_key = (warehouse_name, category)
+    inventory = listing_cache.get(cache_key)
+    if inventory is not None:
+        return inventory
+    
+    generation = listing_cache.generation(cache_key)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''SELECT id, category, part_name, quantity, last_modifier, last_modified, photo_count
+                     FROM inventory
+                     WHERE warehouse = %s AND category = %s
+                     ORDER BY id''', (warehouse_name, category))
+    
+    raw_inventory = cursor.fetchall()
+    conn.close()
+    
+    # 🔧 날짜 형식 변환 처리 (datetime 오류 완전 해결)
+    inventory = []
+    for item in raw_inventory:
+        item_list = list(item)
+        if item_list[5]:  # last_modified가 존재하면
+            if isinstance(item_list[5], str):
+                # 이미 문자열이면 그대로 사용
+                pass
+            else:
+                # datetime 객체면 문자열로 변환
+                item_list[5] = item_list[5].strftime('%Y-%m-%d %H:%M:%S')
+        inventory.append(item_list)
+    
+    listing_cache.set(cache_key, inventory, generation)
+    return inventory
+
+def invalidate_inventory_listing(warehouse_name, category):
+    """재고 변경 커밋 후 해당 목록 캐시 무효화"""
+    listing_cache.invalidate((warehouse_name, category))
+
+# 부품명 자모/초성 검색 인덱스 (프로세스별, 첫 검색 때 적재 후 변경분만 반영)
+part_name_index = HangulIndex()
+_part_name_index_pid = None
+_part_name_index_loaded_at = 0.0
+
+def get_part_name_index(conn):
+    """
+    적재된 부품명 인덱스 반환 (fork된 워커나 무효화된 경우 다시 적재)
+    워커 간 동기화(CACHE_SYNC)를 끈 경우 다른 워커의 추가/삭제를 알 수 없으므로
+    목록 캐시와 같이 LISTING_CACHE_TTL이 지나면 다시 적재합니다.
+    """
+    global _part_name_index_pid, _part_name_index_loaded_at
+    expired = not CACHE_SYNC_ENABLED and time.monotonic() - _part_name_index_loaded_at >= LISTING_CACHE_TTL
+    if not part_name_index.loaded or _part_name_index_pid != os.getpid() or expired:
+        def fetch_rows():
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT id, part_name, warehouse, category FROM inventory')
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        part_name_index.load(fetch_rows)
+        _part_name_index_pid = os.getpid()
+        _part_name_index_loaded_at = time.monotonic()
+        print(f"🔤 부품명 검색 인덱스 적재: {len(part_name_index)}개")
+    return part_name_index
+
+def notify_inventory_change(cursor, warehouse_name, category, **extra):
+    """
+    다른 워커에 재고 변경 알림 (재고 변경과 같은 트랜잭션에서 호출, 커밋 시 전달)
+    아이템 추가/삭제는 op, id, name을 함께 보내 부품명 인덱스도 갱신하게 합니다.
+    """
+    if CACHE_SYNC_ENABLED:
+        publish_change(cursor, warehouse_name, category, **extra)
+
+def handle_inventory_change(change):
+    """다른 워커에서 보낸 재고 변경 알림 처리"""
+    warehouse_name = change.get('w')
+    category = change.get('c')
+    if category is None:
+        listing_cache.invalidate_where(lambda key: key[0] == warehouse_name)
+    else:
+        invalidate_inventory_listing(warehouse_name, category)
+
+    op = change.get('op')
+    if op == 'insert':
+        part_name_index.add(change['id'], change['name'], warehouse_name, category)
+    elif op == 'delete':
+        part_name_index.remove(change['id'])
+    elif op == 'reload':
+        part_name_index.invalidate()
+
+def resync_local_caches():
+    """변경 알림을 놓쳤을 수 있을 때 프로세스 캐시 전체 무효화"""
+    listing_cache.clear()
+    part_name_index.invalidate()
+
+change_listener = ChangeListener(create_db_connection,
+                                 on_change=handle_inventory_change,
+                                 on_reconnect=resync_local_caches,
+                                 poll_interval=CACHE_SYNC_POLL_INTERVAL)
+
+@app.before_request
+def start_change_listener():
+    """워커 프로세스별로 재고 변경 리스너 스레드 시작 (이미 실행 중이면 무시)"""
+    if CACHE_SYNC_ENABLED:
+        change_listener.start()
+
 @app.route('/warehouse/<warehouse_name>/access')
 def access_inventory(warehouse_name):
     """Access 관리 - 기타 부품 재고 관리 페이지"""
@@ -621,32 +984,7 @@ def access_inventory(warehouse_name):
     print(f"🔍 Access 관리 접근: {warehouse_name}, 사용자: {session.get('user_name')}")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''SELECT i.id, i.category, i.part_name, i.quantity, i.last_modifier, i.last_modified,
-                                COUNT(p.id) as photo_count
-                         FROM inventory i
-                         LEFT JOIN photos p ON i.id = p.inventory_id
-                         WHERE i.warehouse = %s AND i.category = %s
-                         GROUP BY i.id, i.category, i.part_name, i.quantity, i.last_modifier, i.last_modified
-                         ORDER BY i.id''', (warehouse_name, "기타"))
-        
-        raw_inventory = cursor.fetchall()
-        conn.close()
-        
-        # 🔧 날짜 형식 변환 처리 (datetime 오류 완전 해결)
-        inventory = []
-        for item in raw_inventory:
-            item_list = list(item)
-            if item_list[5]:  # last_modified가 존재하면
-                if isinstance(item_list[5], str):
-                    # 이미 문자열이면 그대로 사용
-                    pass
-                else:
-                    # datetime 객체면 문자열로 변환
-                    item_list[5] = item_list[5].strftime('%Y-%m-%d %H:%M:%S')
-            inventory.append(item_list)
+        inventory = load_inventory_listing(warehouse_name, "기타")
         
         print(f"✅ Access 관리 재고 데이터 조회 성공: {len(inventory)}개 항목")
         
@@ -704,9 +1042,9 @@ def save_receipt_with_details():
         
         cursor.execute('''
             INSERT INTO delivery_receipts 
-            (receipt_date, receipt_type, items_data, created_by) 
-            VALUES (%s, %s, %s, %s)
-        ''', (receipt_date, receipt_type, items_data_json, session['user_name']))
+            (receipt_date, receipt_type, warehouse, items, created_by) 
+            VALUES (%s, %s, %s, %s::jsonb, %s)
+        ''', (receipt_date, receipt_type, warehouse_name, items_data_json, session['user_name']))
         
         conn.commit()
         
@@ -730,6 +1068,80 @@ def save_receipt_with_details():
 
 # receipt_history 라우트에 추가할 코드
 
+def _placeholder_receipt_item(part_name, remark):
+    """파싱할 수 없는 인수증 항목 표시용"""
+    return {
+        'part_name': part_name,
+        'quantity': 0,
+        'deliverer_dept': '-',
+        'deliverer_name': '-',
+        'receiver_dept': '-',
+        'receiver_name': '-',
+        'purpose': '-',
+        'remark': remark
+    }
+
+def parse_receipt_items_data(items_data):
+    """
+    인수증 items 데이터를 품목 원본 목록으로 변환
+    
+    Returns:
+        (raw_items, error_item): 성공 시 (list, None), 실패 시 (None, 표시용 항목)
+    """
+    if not items_data:
+        print("⚠️ items_data가 비어있음")
+        return None, _placeholder_receipt_item('데이터 없음', '데이터 없음')
+    
+    try:
+        if isinstance(items_data, str):
+            parsed_data = json.loads(items_data)
+        else:
+            parsed_data = items_data
+    except (json.JSONDecodeError, TypeError, AttributeError) as e:
+        print(f"⚠️ items_data JSON 파싱 오류: {e}")
+        return None, _placeholder_receipt_item('JSON 파싱 오류', 'JSON 오류')
+    
+    # 신 형식: {'warehouse': ..., 'items': [...]}
+    if isinstance(parsed_data, dict) and 'items' in parsed_data:
+        items_raw = parsed_data['items']
+        return (items_raw if isinstance(items_raw, list) else []), None
+    
+    # 구 형식: 품목 리스트
+    if isinstance(parsed_data, list):
+        return parsed_data, None
+    
+    print(f"⚠️ 알 수 없는 데이터 형식: {type(parsed_data)}")
+    return None, _placeholder_receipt_item('알 수 없는 형식', '데이터 형식 오류')
+
+def build_receipt_items(raw_items, receipt_type, current_quantities):
+    """품목 원본 목록을 화면 표시용 항목으로 변환 (비고는 미리 조회한 재고량으로 계산)"""
+    items_list = []
+    for item in raw_items:
+        if not isinstance(item, dict):
+            items_list.append(_placeholder_receipt_item(str(item), '-'))
+            continue
+        
+        part_name = item.get('part_name', item.get('name', '알 수 없음'))
+        quantity = item.get('quantity', item.get('qty', 0))
+        
+        try:
+            remark = generate_quantity_remark(current_quantities.get(part_name, 0), quantity, receipt_type)
+        except Exception as remark_error:
+            print(f"비고 생성 실패: {remark_error}")
+            remark = f"{'입고' if receipt_type == 'in' else '출고'} {quantity}개"
+        
+        items_list.append({
+            'part_name': part_name,
+            'quantity': quantity,
+            'deliverer_dept': item.get('deliverer_dept', '-'),
+            'deliverer_name': item.get('deliverer_name', '-'),
+            'receiver_dept': item.get('receiver_dept', '-'),
+            'receiver_name': item.get('receiver_name', '-'),
+            'purpose': item.get('purpose', '-'),
+            'remark': remark
+        })
+    return items_list
+
 @app.route('/receipt_history/<warehouse_name>')
 def receipt_history(warehouse_name):
     """인수증 이력 관리 페이지 - 오류 수정 버전"""
@@ -740,33 +1152,111 @@ def receipt_history(warehouse_name):
     
     print(f"🔍 인수증 이력 조회 시작 - 창고: {warehouse_name}")
     
+    start_date = parse_date_param(request.args.get('start_date'))
+    end_date = parse_date_param(request.args.get('end_date'))
+    direction = 'prev' if request.args.get('direction') == 'prev' else 'next'
+    per_page = min(max(request.args.get('per_page', RECEIPTS_PER_PAGE, type=int), 1), 100)
+    
+    cursor_values = None
+    raw_cursor = decode_page_cursor(request.args.get('cursor'))
+    if raw_cursor and len(raw_cursor) == 3:
+        try:
+            cursor_values = [datetime.strptime(raw_cursor[0], '%Y-%m-%d').date(),
+                             datetime.fromisoformat(raw_cursor[1]),
+                             int(raw_cursor[2])]
+        except (TypeError, ValueError):
+            cursor_values = None
+    
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # ID 포함하여 조회 (삭제 기능용)
-        cursor.execute('''
-            SELECT id, receipt_date, receipt_type, items_data, created_by, created_at
+        # 기간 필터
+        where_conditions = ['warehouse = %s']
+        filter_params = [warehouse_name]
+        if start_date:
+            where_conditions.append('receipt_date >= %s')
+            filter_params.append(start_date)
+        if end_date:
+            where_conditions.append('receipt_date <= %s')
+            filter_params.append(end_date)
+        
+        # 키셋 페이지네이션: (receipt_date, created_at, id) 기준으로 이어서 조회
+        page_conditions = list(where_conditions)
+        page_params = list(filter_params)
+        if cursor_values:
+            if direction == 'prev':
+                page_conditions.append('(receipt_date, created_at, id) > (%s, %s, %s)')
+            else:
+                page_conditions.append('(receipt_date, created_at, id) < (%s, %s, %s)')
+            page_params.extend(cursor_values)
+        
+        order = 'ASC' if direction == 'prev' else 'DESC'
+        
+        # ID 포함하여 조회 (삭제 기능용), 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+        cursor.execute(f'''
+            SELECT id, receipt_date, receipt_type, COALESCE(items::text, items_data), created_by, created_at
             FROM delivery_receipts
-            WHERE items_data LIKE %s
-            ORDER BY receipt_date DESC, created_at DESC
-            LIMIT 20
-        ''', (f'%{warehouse_name}%',))
+            WHERE {' AND '.join(page_conditions)}
+            ORDER BY receipt_date {order}, created_at {order}, id {order}
+            LIMIT %s
+        ''', page_params + [per_page + 1])
         
         receipts = cursor.fetchall()
-        conn.close()
+        has_more = len(receipts) > per_page
+        receipts = receipts[:per_page]
+        if direction == 'prev':
+            receipts.reverse()
+        
+        # 이전/다음 페이지 커서
+        if receipts:
+            first_key = (receipts[0][1], receipts[0][5], receipts[0][0])
+            last_key = (receipts[-1][1], receipts[-1][5], receipts[-1][0])
+            if direction == 'prev':
+                prev_cursor = encode_page_cursor(first_key) if has_more else None
+                next_cursor = encode_page_cursor(last_key)
+            else:
+                prev_cursor = encode_page_cursor(first_key) if cursor_values else None
+                next_cursor = encode_page_cursor(last_key) if has_more else None
+        else:
+            prev_cursor = next_cursor = None
+        
+        # 전체 건수는 COUNT(*) 대신 실행 계획 추정치 사용
+        total_count = estimate_row_count(
+            conn, f"SELECT 1 FROM delivery_receipts WHERE {' AND '.join(where_conditions)}", filter_params)
         
         print(f"📋 조회된 인수증: {len(receipts)}개")
         
-        # 안전한 파싱 - 비고 정보 개선
+        # 1단계: 인수증 파싱 및 참조된 부품명 수집
+        parsed_items = []
+        part_names = set()
+        for receipt in receipts:
+            raw_items, error_item = parse_receipt_items_data(receipt[3])
+            parsed_items.append((raw_items, error_item))
+            for item in raw_items or []:
+                if isinstance(item, dict):
+                    part_names.add(str(item.get('part_name', item.get('name', '알 수 없음'))))
+        
+        # 2단계: 비고용 현재 재고량을 한 번에 조회
+        current_quantities = {}
+        if part_names:
+            cursor.execute('''
+                SELECT part_name, quantity FROM inventory
+                WHERE warehouse = %s AND category = %s AND part_name = ANY(%s)
+            ''', (warehouse_name, "기타", list(part_names)))
+            for part_name, quantity in cursor.fetchall():
+                current_quantities[part_name] = quantity or 0
+        
+        conn.close()
+        
+        # 3단계: 메모리에서 화면용 데이터 구성
         parsed_receipts = []
         
-        for receipt in receipts:
+        for receipt, (raw_items, error_item) in zip(receipts, parsed_items):
             try:
                 receipt_id = receipt[0]
                 receipt_date = receipt[1]
                 receipt_type = receipt[2]
-                items_data = receipt[3]
                 created_by = receipt[4]
                 
                 # 날짜 처리
@@ -775,143 +1265,18 @@ def receipt_history(warehouse_name):
                 else:
                     formatted_date = str(receipt_date) if receipt_date else ''
                 
-                print(f"🔍 처리 중인 인수증: {receipt_id}, 날짜: {formatted_date}, 타입: {receipt_type}")
-                
-                # items_data 안전하게 파싱
-                items_list = []
-                
-                if items_data:
-                    try:
-                        if isinstance(items_data, str):
-                            parsed_data = json.loads(items_data)
-                        else:
-                            parsed_data = items_data
-                        
-                        print(f"📊 파싱된 데이터 타입: {type(parsed_data)}")
-                        
-                        # parsed_data가 딕셔너리이고 'items' 키가 있는 경우
-                        if isinstance(parsed_data, dict) and 'items' in parsed_data:
-                            items_raw = parsed_data['items']
-                            print(f"📦 아이템 개수: {len(items_raw) if isinstance(items_raw, list) else 0}")
-                            
-                            if isinstance(items_raw, list):
-                                for item in items_raw:
-                                    if isinstance(item, dict):
-                                        part_name = item.get('part_name', item.get('name', '알 수 없음'))
-                                        quantity = item.get('quantity', item.get('qty', 0))
-                                        
-                                        # 비고 생성 (수정된 함수 호출)
-                                        try:
-                                            remark = generate_quantity_remark(warehouse_name, part_name, quantity, receipt_type)
-                                        except Exception as remark_error:
-                                            print(f"비고 생성 실패: {remark_error}")
-                                            remark = f"{receipt_type} {quantity}개"
-                                        
-                                        items_list.append({
-                                            'part_name': part_name,
-                                            'quantity': quantity,
-                                            'deliverer_dept': item.get('deliverer_dept', '-'),
-                                            'deliverer_name': item.get('deliverer_name', '-'),
-                                            'receiver_dept': item.get('receiver_dept', '-'),
-                                            'receiver_name': item.get('receiver_name', '-'),
-                                            'purpose': item.get('purpose', '-'),
-                                            'remark': remark
-                                        })
-                                    else:
-                                        items_list.append({
-                                            'part_name': str(item),
-                                            'quantity': 0,
-                                            'deliverer_dept': '-',
-                                            'deliverer_name': '-',
-                                            'receiver_dept': '-',
-                                            'receiver_name': '-',
-                                            'purpose': '-',
-                                            'remark': '-'
-                                        })
-                        
-                        # parsed_data가 리스트인 경우 (구 형식)
-                        elif isinstance(parsed_data, list):
-                            print("📦 구 형식 리스트 데이터 처리")
-                            for item in parsed_data:
-                                if isinstance(item, dict):
-                                    part_name = item.get('part_name', item.get('name', '알 수 없음'))
-                                    quantity = item.get('quantity', item.get('qty', 0))
-                                    
-                                    try:
-                                        remark = generate_quantity_remark(warehouse_name, part_name, quantity, receipt_type)
-                                    except Exception as remark_error:
-                                        print(f"비고 생성 실패: {remark_error}")
-                                        remark = f"{receipt_type} {quantity}개"
-                                    
-                                    items_list.append({
-                                        'part_name': part_name,
-                                        'quantity': quantity,
-                                        'deliverer_dept': item.get('deliverer_dept', '-'),
-                                        'deliverer_name': item.get('deliverer_name', '-'),
-                                        'receiver_dept': item.get('receiver_dept', '-'),
-                                        'receiver_name': item.get('receiver_name', '-'),
-                                        'purpose': item.get('purpose', '-'),
-                                        'remark': remark
-                                    })
-                                else:
-                                    items_list.append({
-                                        'part_name': str(item),
-                                        'quantity': 0,
-                                        'deliverer_dept': '-',
-                                        'deliverer_name': '-',
-                                        'receiver_dept': '-',
-                                        'receiver_name': '-',
-                                        'purpose': '-',
-                                        'remark': '-'
-                                    })
-                        else:
-                            print(f"⚠️ 알 수 없는 데이터 형식: {type(parsed_data)}")
-                            items_list = [{
-                                'part_name': '알 수 없는 형식',
-                                'quantity': 0,
-                                'deliverer_dept': '-',
-                                'deliverer_name': '-',
-                                'receiver_dept': '-',
-                                'receiver_name': '-',
-                                'purpose': '-',
-                                'remark': '데이터 형식 오류'
-                            }]
-                        
-                    except (json.JSONDecodeError, TypeError, AttributeError) as e:
-                        print(f"⚠️ items_data JSON 파싱 오류: {e}")
-                        items_list = [{
-                            'part_name': 'JSON 파싱 오류',
-                            'quantity': 0,
-                            'deliverer_dept': '-',
-                            'deliverer_name': '-',
-                            'receiver_dept': '-',
-                            'receiver_name': '-',
-                            'purpose': '-',
-                            'remark': 'JSON 오류'
-                        }]
+                if error_item:
+                    items_list = [error_item]
                 else:
-                    print("⚠️ items_data가 비어있음")
-                    items_list = [{
-                        'part_name': '데이터 없음',
-                        'quantity': 0,
-                        'deliverer_dept': '-',
-                        'deliverer_name': '-',
-                        'receiver_dept': '-',
-                        'receiver_name': '-',
-                        'purpose': '-',
-                        'remark': '데이터 없음'
-                    }]
+                    items_list = build_receipt_items(raw_items, receipt_type, current_quantities)
                 
-                receipt_dict = {
+                parsed_receipts.append({
                     'id': receipt_id,
                     'date': formatted_date,
                     'type': receipt_type or 'unknown',
                     'receipt_items': items_list,
                     'created_by': created_by or '미설정'
-                }
-                
-                parsed_receipts.append(receipt_dict)
-                print(f"✅ 인수증 {receipt_id} 파싱 완료: {len(items_list)}개 아이템")
+                })
                 
             except Exception as e:
                 print(f"⚠️ 인수증 전체 파싱 오류: {e}")
@@ -922,16 +1287,7 @@ def receipt_history(warehouse_name):
                     'id': receipt[0] if len(receipt) > 0 else 0,
                     'date': '날짜 오류',
                     'type': 'unknown',
-                    'receipt_items': [{
-                        'part_name': '전체 오류 발생',
-                        'quantity': 0,
-                        'deliverer_dept': '-',
-                        'deliverer_name': '-',
-                        'receiver_dept': '-',
-                        'receiver_name': '-',
-                        'purpose': '-',
-                        'remark': '전체 오류'
-                    }],
+                    'receipt_items': [_placeholder_receipt_item('전체 오류 발생', '전체 오류')],
                     'created_by': '미설정'
                 })
                 continue
@@ -941,9 +1297,13 @@ def receipt_history(warehouse_name):
         template_vars = {
             'warehouse_name': warehouse_name,
             'receipts': parsed_receipts,
-            'current_page': 1,
-            'total_pages': 1,
-            'total_count': len(parsed_receipts),
+            'total_count': total_count if total_count is not None else len(parsed_receipts),
+            'total_count_is_estimate': total_count is not None,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'start_date': start_date.isoformat() if start_date else '',
+            'end_date': end_date.isoformat() if end_date else '',
+            'per_page': per_page,
             'is_admin': session.get('is_admin', False)
         }
         
@@ -956,40 +1316,18 @@ def receipt_history(warehouse_name):
         flash('인수증 이력을 불러오는 중 오류가 발생했습니다.')
         return redirect(f'/warehouse/{warehouse_name}/access')
         
-def generate_quantity_remark(warehouse_name, part_name, quantity, receipt_type):
-    """수량 변화 비고 생성 함수 - 올바른 버전"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 현재 재고량 조회
-        cursor.execute('''
-            SELECT quantity FROM inventory 
-            WHERE warehouse = %s AND part_name = %s AND category = %s
-        ''', (warehouse_name, part_name, "기타"))
-        
-        result = cursor.fetchone()
-        current_qty = result[0] if result else 0
-        
-        conn.close()
-        
-        if receipt_type == 'in':
-            # 입고: 현재 수량에서 입고량을 뺀 것이 입고 전 수량
-            before_qty = max(0, current_qty - quantity)
-            after_qty = current_qty
-            return f"입고전 {before_qty}개 → 입고후 {after_qty}개"
-        else:
-            # 출고: 현재 수량에 출고량을 더한 것이 출고 전 수량
-            before_qty = current_qty + quantity
-            after_qty = current_qty
-            return f"출고전 {before_qty}개 → 출고후 {after_qty}개"
-            
-    except Exception as e:
-        print(f"비고 생성 오류: {e}")
-        if receipt_type == 'in':
-            return f"입고 {quantity}개"
-        else:
-            return f"출고 {quantity}개"
+def generate_quantity_remark(current_qty, quantity, receipt_type):
+    """수량 변화 비고 생성 함수 (현재 재고량은 호출 측에서 일괄 조회)"""
+    if receipt_type == 'in':
+        # 입고: 현재 수량에서 입고량을 뺀 것이 입고 전 수량
+        before_qty = max(0, current_qty - quantity)
+        after_qty = current_qty
+        return f"입고전 {before_qty}개 → 입고후 {after_qty}개"
+    else:
+        # 출고: 현재 수량에 출고량을 더한 것이 출고 전 수량
+        before_qty = current_qty + quantity
+        after_qty = current_qty
+        return f"출고전 {before_qty}개 → 출고후 {after_qty}개"
         
 
 # 디버깅용 라우트 추가
@@ -1005,16 +1343,16 @@ def debug_receipts(warehouse_name):
         cursor = conn.cursor()
         
         # 모든 인수증 조회
-        cursor.execute('SELECT id, receipt_date, receipt_type, items_data, created_by, created_at FROM delivery_receipts ORDER BY created_at DESC LIMIT 20')
+        cursor.execute('SELECT id, receipt_date, receipt_type, COALESCE(items::text, items_data), created_by, created_at FROM delivery_receipts ORDER BY created_at DESC LIMIT 20')
         all_receipts = cursor.fetchall()
         
         # 특정 창고 인수증 조회
         cursor.execute('''
-            SELECT id, receipt_date, receipt_type, items_data, created_by, created_at 
+            SELECT id, receipt_date, receipt_type, COALESCE(items::text, items_data), created_by, created_at 
             FROM delivery_receipts 
-            WHERE items_data::text LIKE %s 
-            ORDER BY created_at DESC LIMIT 20
-        ''', (f'%"warehouse": "{warehouse_name}"%',))
+            WHERE warehouse = %s 
+            ORDER BY receipt_date DESC, created_at DESC, id DESC LIMIT 20
+        ''', (warehouse_name,))
         warehouse_receipts = cursor.fetchall()
         
         conn.close()
@@ -1091,11 +1429,12 @@ def add_access_inventory_item():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('INSERT INTO inventory (warehouse, category, part_name, quantity, last_modifier, last_modified) VALUES (%s, %s, %s, %s, %s, %s)',
-                      (warehouse_name, category, part_name, quantity, session['user_name'], korea_time))
+        item_id = create_inventory_item(cursor, warehouse_name, category, part_name, quantity, session['user_name'], korea_time)
         
         conn.commit()
         conn.close()
+        invalidate_inventory_listing(warehouse_name, category)
+        part_name_index.add(item_id, part_name, warehouse_name, category)
         flash('재고 아이템이 추가되었습니다.')
         
     except Exception as e:
@@ -1123,13 +1462,17 @@ def get_inventory_changes():
         change_type = data.get('type')  # 'in' 또는 'out'
         warehouse_name = data.get('warehouse')
         
+        # 보관 기간 이전 날짜는 아카이브에서 조회
+        target = parse_date_param(target_date)
+        source = history_source(target is None or target < get_history_cutoff().date(), alias='h')
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # 해당 날짜의 변경 내역 조회
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT h.inventory_id, i.part_name, h.quantity_change, h.modifier_name, h.modified_at
-            FROM inventory_history h
+            FROM {source}
             JOIN inventory i ON h.inventory_id = i.id
             WHERE DATE(h.modified_at AT TIME ZONE 'Asia/Seoul') = %s
             AND h.change_type = %s
@@ -1171,6 +1514,7 @@ def save_delivery_receipt():
         data = request.get_json()
         receipt_date = data.get('date')
         receipt_type = data.get('type')
+        warehouse_name = data.get('warehouse')
         items_data = data.get('items', [])
         signature_data = data.get('signature')
         
@@ -1180,12 +1524,14 @@ def save_delivery_receipt():
         # 인수증 데이터 저장
         cursor.execute('''
             INSERT INTO delivery_receipts 
-            (receipt_date, receipt_type, items_data, signature_data, created_by) 
-            VALUES (%s, %s, %s, %s, %s)
-        ''', (receipt_date, receipt_type, str(items_data), signature_data, session['user_name']))
+            (receipt_date, receipt_type, warehouse, items, signature_data, created_by) 
+            VALUES (%s, %s, %s, %s::jsonb, %s, %s)
+            RETURNING id
+        ''', (receipt_date, receipt_type, warehouse_name, json.dumps(items_data, ensure_ascii=False),
+              signature_data, session['user_name']))
         
+        receipt_id = cursor.fetchone()[0]
         conn.commit()
-        receipt_id = cursor.lastrowid if cursor.lastrowid else cursor.fetchone()[0]
         conn.close()
         
         return jsonify({
@@ -1373,32 +1719,7 @@ def electric_inventory(warehouse_name):
     print(f"🔍 전기차 부품 재고 접근: {warehouse_name}, 사용자: {session.get('user_name')}")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''SELECT i.id, i.category, i.part_name, i.quantity, i.last_modifier, i.last_modified,
-                                COUNT(p.id) as photo_count
-                         FROM inventory i
-                         LEFT JOIN photos p ON i.id = p.inventory_id
-                         WHERE i.warehouse = %s AND i.category = %s
-                         GROUP BY i.id, i.category, i.part_name, i.quantity, i.last_modifier, i.last_modified
-                         ORDER BY i.id''', (warehouse_name, "전기차"))
-        
-        raw_inventory = cursor.fetchall()
-        conn.close()
-        
-        # 🔧 날짜 형식 변환 처리 (datetime 오류 완전 해결)
-        inventory = []
-        for item in raw_inventory:
-            item_list = list(item)
-            if item_list[5]:  # last_modified가 존재하면
-                if isinstance(item_list[5], str):
-                    # 이미 문자열이면 그대로 사용
-                    pass
-                else:
-                    # datetime 객체면 문자열로 변환
-                    item_list[5] = item_list[5].strftime('%Y-%m-%d %H:%M:%S')
-            inventory.append(item_list)
+        inventory = load_inventory_listing(warehouse_name, "전기차")
         
         print(f"✅ 재고 데이터 조회 성공: {len(inventory)}개 항목")
         
@@ -1434,11 +1755,12 @@ def add_inventory_item():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('INSERT INTO inventory (warehouse, category, part_name, quantity, last_modifier, last_modified) VALUES (%s, %s, %s, %s, %s, %s)',
-                      (warehouse_name, category, part_name, quantity, session['user_name'], korea_time))
+        item_id = create_inventory_item(cursor, warehouse_name, category, part_name, quantity, session['user_name'], korea_time)
         
         conn.commit()
         conn.close()
+        invalidate_inventory_listing(warehouse_name, category)
+        part_name_index.add(item_id, part_name, warehouse_name, category)
         flash('재고 아이템이 추가되었습니다.')
         
     except Exception as e:
@@ -1446,6 +1768,152 @@ def add_inventory_item():
     
     return redirect(f'/warehouse/{warehouse_name}/electric')
 
+# 요약 변경분 합산/재계산을 한 트랜잭션씩만 하도록 사용하는 advisory lock 키
+SUMMARY_FOLD_LOCK_KEY = 7283003
+
+# 창고/카테고리별 요약 = 합산된 요약 + 아직 합산되지 않은 변경분
+INVENTORY_SUMMARY_SOURCE = '''(SELECT warehouse, category, item_count, total_quantity FROM inventory_summary
+                              UNION ALL
+                              SELECT warehouse, category, item_delta, quantity_delta FROM inventory_summary_deltas) AS summary'''
+
+def bump_inventory_summary(cursor, warehouse, category, item_delta, quantity_delta, changed_at):
+    """
+    창고/카테고리별 재고 요약에 변경분 추가 (재고 변경과 같은 트랜잭션에서 호출)
+    요약 행을 직접 갱신하면 같은 카테고리의 모든 재고 변경이 그 행 잠금에 직렬화되므로
+    변경분 테이블에 행만 추가합니다 (잠금 경합 없음).
+    """
+    cursor.execute('''
+        INSERT INTO inventory_summary_deltas (warehouse, category, item_delta, quantity_delta, changed_at)
+        VALUES (%s, %s, %s, %s, %s::timestamp)
+    ''', (warehouse, category, item_delta, quantity_delta, changed_at))
+
+def fold_inventory_summary(conn):
+    """
+    쌓인 변경분을 inventory_summary에 합산 (조회 시 호출, 다른 트랜잭션이 합산 중이면 건너뜀)
+    합산은 한 번에 한 트랜잭션만 하며 요약 행은 (창고, 카테고리) 순서로 갱신합니다.
+
+    Returns:
+        합산한 (창고, 카테고리) 수, 건너뛴 경우 None
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', (SUMMARY_FOLD_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            conn.rollback()
+            return None
+        cursor.execute('''
+            WITH folded AS (
+                DELETE FROM inventory_summary_deltas
+                RETURNING warehouse, category, item_delta, quantity_delta, changed_at
+            )
+            INSERT INTO inventory_summary (warehouse, category, item_count, total_quantity, last_changed)
+            SELECT warehouse, category, SUM(item_delta), SUM(quantity_delta), MAX(changed_at)
+            FROM folded
+            GROUP BY warehouse, category
+            ORDER BY warehouse, category
+            ON CONFLICT (warehouse, category) DO UPDATE
+            SET item_count = inventory_summary.item_count + EXCLUDED.item_count,
+                total_quantity = inventory_summary.total_quantity + EXCLUDED.total_quantity,
+                last_changed = GREATEST(inventory_summary.last_changed, EXCLUDED.last_changed)
+        ''')
+        folded = cursor.rowcount
+        conn.commit()
+        return folded
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def create_inventory_item(cursor, warehouse, category, part_name, quantity, modifier_name, korea_time):
+    """재고 아이템 추가 + 요약 반영, 새 아이템 ID 반환"""
+    cursor.execute('''INSERT INTO inventory (warehouse, category, part_name, quantity, last_modifier, last_modified)
+                      VALUES (%s, %s, %s, %s, %s, %s)
+                      RETURNING id''',
+                   (warehouse, category, part_name, quantity, modifier_name, korea_time))
+    item_id = cursor.fetchone()[0]
+    bump_inventory_summary(cursor, warehouse, category, 1, quantity, korea_time)
+    notify_inventory_change(cursor, warehouse, category, op='insert', id=item_id, name=part_name)
+    return item_id
+
+def refresh_inventory_summary(cursor, warehouse=None):
+    """요약 재계산 쿼리 (호출 측에서 재고 쓰기를 막은 트랜잭션 안에서 실행)"""
+    # 합산 작업이 끝날 때까지 대기 (재고 쓰기가 막혀 있으므로 남은 변경분은 모두 inventory에 반영된 상태)
+    cursor.execute('SELECT pg_advisory_xact_lock(%s)', (SUMMARY_FOLD_LOCK_KEY,))
+    if warehouse:
+        cursor.execute('DELETE FROM inventory_summary_deltas WHERE warehouse = %s', (warehouse,))
+        cursor.execute('DELETE FROM inventory_summary WHERE warehouse = %s', (warehouse,))
+        cursor.execute('''INSERT INTO inventory_summary (warehouse, category, item_count, total_quantity, last_changed)
+                          SELECT warehouse, category, COUNT(*), COALESCE(SUM(quantity), 0), MAX(last_modified)
+                          FROM inventory WHERE warehouse = %s
+                          GROUP BY warehouse, category''', (warehouse,))
+    else:
+        cursor.execute('DELETE FROM inventory_summary_deltas')
+        cursor.execute('DELETE FROM inventory_summary')
+        cursor.execute('''INSERT INTO inventory_summary (warehouse, category, item_count, total_quantity, last_changed)
+                          SELECT warehouse, category, COUNT(*), COALESCE(SUM(quantity), 0), MAX(last_modified)
+                          FROM inventory
+                          GROUP BY warehouse, category''')
+    return cursor.rowcount
+
+def rebuild_inventory_summary(conn, warehouse=None):
+    """inventory 테이블 기준으로 요약 재계산 (warehouse 지정 시 해당 창고만)"""
+    cursor = conn.cursor()
+    try:
+        # 재계산 중 다른 트랜잭션의 변경분이 누락되지 않도록 재고 쓰기 차단
+        cursor.execute('LOCK TABLE inventory IN SHARE MODE')
+        rows = refresh_inventory_summary(cursor, warehouse)
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def apply_quantity_change(cursor, item_id, change_type, quantity, modifier_name, korea_time):
+    """
+    재고 수량 변경 + 이력 기록 + 요약 반영 + 워커 간 변경 알림을 단일 쿼리로 처리
+    
+    UPDATE의 WHERE 조건에서 재고 부족을 검사하므로 행 잠금 하에서 판단되며,
+    여러 워커가 동시에 출고해도 재고가 음수가 되거나 서로 덮어쓰지 않습니다.
+    
+    Returns:
+        (new_quantity, (warehouse, category), None) 성공 시
+        (None, None, error_message) 품목이 없거나 재고가 부족한 경우
+    """
+    quantity_change = -quantity if change_type == 'out' else quantity
+    
+    cursor.execute('''
+        WITH updated AS (
+            UPDATE inventory
+            SET quantity = COALESCE(quantity, 0) + %s, last_modifier = %s, last_modified = %s
+            WHERE id = %s AND COALESCE(quantity, 0) + %s >= 0
+            RETURNING id, quantity, warehouse, category
+        ), history AS (
+            INSERT INTO inventory_history (inventory_id, change_type, quantity_change, modifier_name, modified_at)
+            SELECT id, %s, %s, %s, %s::timestamp FROM updated
+        ), summary AS (
+            INSERT INTO inventory_summary_deltas (warehouse, category, item_delta, quantity_delta, changed_at)
+            SELECT warehouse, category, 0, %s, %s::timestamp FROM updated
+        )
+        SELECT quantity, warehouse, category,
+               CASE WHEN %s::boolean THEN pg_notify(%s::text, json_build_object('w', warehouse, 'c', category, 'o', %s::text)::text) END
+        FROM updated
+    ''', (quantity_change, modifier_name, korea_time, item_id, quantity_change,
+          change_type, quantity_change, modifier_name, korea_time,
+          quantity_change, korea_time,
+          CACHE_SYNC_ENABLED, CHANGE_CHANNEL, process_origin()))
+    result = cursor.fetchone()
+    if result:
+        return result[0], (result[1], result[2]), None
+    
+    # 실패한 경우에만 원인 확인
+    cursor.execute('SELECT 1 FROM inventory WHERE id = %s', (item_id,))
+    if not cursor.fetchone():
+        return None, None, '재고 항목을 찾을 수 없습니다.'
+    return None, None, '재고가 부족합니다.'
+
 @app.route('/update_quantity', methods=['POST'])
 def update_quantity():
     """재고 수량 업데이트"""
@@ -1457,47 +1925,209 @@ def update_quantity():
         item_id = data['item_id']
         change_type = data['change_type']
         quantity_change = int(data['quantity'])
+        korea_time = get_korea_time().strftime('%Y-%m-%d %H:%M:%S')
 
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT quantity, warehouse FROM inventory WHERE id = %s', (item_id,))
-        result = cursor.fetchone()
-        if not result:
+        new_quantity, listing_key, error_message = apply_quantity_change(
+            cursor, item_id, change_type, quantity_change, session['user_name'], korea_time)
+        if error_message:
+            conn.rollback()
             conn.close()
-            return jsonify({'success': False, 'message': '재고 항목을 찾을 수 없습니다.'})
-            
-        current_quantity, warehouse = result
+            return jsonify({'success': False, 'message': error_message})
 
-        if change_type == 'out':
-            quantity_change = -quantity_change
-            if current_quantity + quantity_change < 0:
-                conn.close()
-                return jsonify({'success': False, 'message': '재고가 부족합니다.'})
+        conn.commit()
+        conn.close()
+        invalidate_inventory_listing(*listing_key)
+
+        return jsonify({'success': True, 'new_quantity': new_quantity})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': '수량 업데이트 중 오류가 발생했습니다.'})
 
-        new_quantity = current_quantity + quantity_change
+@app.route('/update_quantities', methods=['POST'])
+def update_quantities():
+    """재고 수량 일괄 업데이트 - 전체 성공 또는 전체 취소"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': '변경할 품목이 없습니다.'}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({'success': False, 'message': f'한 번에 최대 {MAX_BATCH_ITEMS}개 품목까지 처리할 수 있습니다.'}), 400
+
+    # 1단계: 입력값 검증 (DB 접근 전)
+    results = []
+    changes = []
+    for index, item in enumerate(items):
+        try:
+            item_id = int(item['item_id'])
+            change_type = item['change_type']
+            quantity = int(item['quantity'])
+            if change_type not in ('in', 'out'):
+                raise ValueError('change_type')
+            if quantity < 1:
+                raise ValueError('quantity')
+        except (KeyError, TypeError, ValueError):
+            results.append({'index': index, 'item_id': item.get('item_id') if isinstance(item, dict) else None,
+                            'success': False, 'message': '입력값이 올바르지 않습니다.'})
+            continue
+        results.append({'index': index, 'item_id': item_id, 'success': False})
+        changes.append((index, item_id, change_type, quantity))
+
+    if len(changes) != len(items):
+        return jsonify({'success': False, 'message': '입력값이 올바르지 않은 품목이 있습니다.', 'results': results}), 400
+
+    # 2단계: 하나의 트랜잭션으로 적용 (교착 방지를 위해 품목 ID 순서로 잠금)
+    try:
         korea_time = get_korea_time().strftime('%Y-%m-%d %H:%M:%S')
+        conn = get_db_connection()
+        cursor = conn.cursor()
 
-        cursor.execute('UPDATE inventory SET quantity = %s, last_modifier = %s, last_modified = %s WHERE id = %s',
-                      (new_quantity, session['user_name'], korea_time, item_id))
+        failed = False
+        listing_keys = set()
+        for index, item_id, change_type, quantity in sorted(changes, key=lambda c: c[1]):
+            new_quantity, listing_key, error_message = apply_quantity_change(
+                cursor, item_id, change_type, quantity, session['user_name'], korea_time)
+            if error_message:
+                results[index]['message'] = error_message
+                failed = True
+            else:
+                results[index]['success'] = True
+                results[index]['new_quantity'] = new_quantity
+                listing_keys.add(listing_key)
 
-        cursor.execute('INSERT INTO inventory_history (inventory_id, change_type, quantity_change, modifier_name, modified_at) VALUES (%s, %s, %s, %s, %s)',
-                      (item_id, change_type, quantity_change, session['user_name'], korea_time))
+        if failed:
+            conn.rollback()
+            conn.close()
+            # 전체 취소되었으므로 성공한 줄도 반영되지 않음
+            for result in results:
+                if result['success']:
+                    result['success'] = False
+                    result.pop('new_quantity', None)
+                    result['message'] = '다른 품목 오류로 취소되었습니다.'
+            return jsonify({'success': False, 'message': '일부 품목을 처리할 수 없어 전체 취소되었습니다.', 'results': results})
 
         conn.commit()
         conn.close()
+        for listing_key in listing_keys:
+            invalidate_inventory_listing(*listing_key)
+
+        return jsonify({'success': True, 'results': results})
 
-        return jsonify({'success': True, 'new_quantity': new_quantity})
-        
     except Exception as e:
+        print(f"❌ 일괄 수량 업데이트 오류: {e}")
         return jsonify({'success': False, 'message': '수량 업데이트 중 오류가 발생했습니다.'})
 
+def set_photo_job_status(job_id, status, message=None):
+    """사진 처리 작업 상태 갱신"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''UPDATE photo_jobs SET status = %s, message = COALESCE(%s, message),
+                          updated_at = (NOW() AT TIME ZONE 'Asia/Seoul')
+                          WHERE id = %s''', (status, message, job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def process_photo_job(job):
+    """사진 처리 작업 (워커 스레드) - 이미지 압축 + Supabase Storage 업로드 + DB 저장"""
+    job_id = job['id']
+    set_photo_job_status(job_id, 'processing')
+    uploaded_filenames = []
+    committed = False
+    try:
+        # 이미지 압축 (1MB 미만으로)
+        # 갤러리용 썸네일/중간 크기 사본도 함께 생성
+        compressed_bytes, final_size_kb, rendition_images = compress_image_with_renditions(
+            job['file'],
+            max_size_mb=0.9,  # 1MB보다 약간 작게
+            max_width=800,    # 최대 800px 폭
+            quality=85        # 초기 품질
+        )
+        if not compressed_bytes:
+            raise Exception('이미지 압축에 실패했습니다.')
+
+        # Supabase Storage에 업로드
+        supabase_url = upload_to_supabase_storage(compressed_bytes, job['filename'])
+        if not supabase_url:
+            raise Exception('Supabase Storage 업로드에 실패했습니다.')
+        rendition_urls = upload_photo_renditions(job['filename'], rendition_images, supabase_url)
+        uploaded_filenames = photo_storage_filenames(job['filename'], rendition_urls.get('thumb'),
+                                                     rendition_urls.get('medium'))
+
+        original_size_mb = job['original_size'] / (1024 * 1024)
+        message = f'사진이 업로드되었습니다. (원본: {original_size_mb:.1f}MB → 압축: {final_size_kb:.0f}KB)'
+
+        # 데이터베이스에 정보 저장 (사진 등록과 작업 완료를 한 트랜잭션으로)
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''INSERT INTO photos
+                            (inventory_id, filename, original_name, file_size, uploaded_by, supabase_url,
+                             thumbnail_url, medium_url)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id''',
+                          (job['inventory_id'], job['filename'], job['original_name'], int(final_size_kb),
+                           job['uploaded_by'], supabase_url,
+                           rendition_urls.get('thumb'), rendition_urls.get('medium')))
+            photo_id = cursor.fetchone()[0]
+            cursor.execute('UPDATE inventory SET photo_count = photo_count + 1 WHERE id = %s RETURNING warehouse, category',
+                          (job['inventory_id'],))
+            listing_key = cursor.fetchone()
+            if listing_key:
+                notify_inventory_change(cursor, *listing_key)
+            cursor.execute('''UPDATE photo_jobs SET status = 'done', message = %s, photo_id = %s, file_size = %s,
+                              supabase_url = %s, updated_at = (NOW() AT TIME ZONE 'Asia/Seoul')
+                              WHERE id = %s''',
+                          (message, photo_id, int(final_size_kb), supabase_url, job_id))
+            conn.commit()
+            committed = True
+        finally:
+            conn.close()
+        if listing_key:
+            invalidate_inventory_listing(*listing_key)
+        print(f"✅ 사진 처리 완료 ({job_id}): {supabase_url}")
+
+    except Exception as e:
+        print(f"❌ 사진 처리 오류 ({job_id}): {e}")
+        if uploaded_filenames and not committed:
+            # 사진이 등록되지 않았으면 (예: 처리 중 재고 아이템 삭제) 올려 둔 파일도 삭제
+            try:
+                delete_from_supabase_storage(uploaded_filenames)
+            except Exception as storage_error:
+                print(f"⚠️ 등록되지 않은 사진 파일 삭제 실패 ({job_id}): {storage_error}")
+        try:
+            set_photo_job_status(job_id, 'failed', str(e))
+        except Exception as status_error:
+            print(f"⚠️ 사진 처리 작업 상태 저장 실패 ({job_id}): {status_error}")
+        raise
+
+photo_job_queue = PhotoJobQueue(process_photo_job, workers=PHOTO_WORKERS, max_queued=PHOTO_QUEUE_SIZE)
+
+def photo_queue_busy_response():
+    """사진 처리 큐가 가득 찼을 때 응답 (잠시 후 재시도 안내)"""
+    response = jsonify({'success': False, 'busy': True,
+                        'message': '사진 처리 대기 중인 작업이 많습니다. 잠시 후 다시 업로드해 주세요.'})
+    return response, 503, {'Retry-After': '10'}
+
 @app.route('/upload_photo/<int:item_id>', methods=['POST'])
 def upload_photo(item_id):
-    """사진 업로드 - Supabase Storage + 이미지 압축"""
+    """사진 업로드 접수 - 파일을 임시 저장하고 압축/업로드는 백그라운드에서 처리"""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
 
+    # 본문(파일)을 받기 전에 큐와 크기부터 확인 - request.files에 접근하면 업로드 전체를 수신함
+    if photo_job_queue.is_full():
+        return photo_queue_busy_response()
+    if request.content_length is None:
+        return jsonify({'success': False, 'message': '업로드 크기를 확인할 수 없습니다.'}), 411
+    if request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'success': False, 'message': '파일이 너무 큽니다. (최대 16MB)'}), 413
+
     if 'photo' not in request.files:
         return jsonify({'success': False, 'message': '파일이 선택되지 않았습니다.'})
 
@@ -1506,62 +2136,106 @@ def upload_photo(item_id):
         return jsonify({'success': False, 'message': '파일이 선택되지 않았습니다.'})
 
     if file and allowed_file(file.filename):
+        upload = None
+        job_id = uuid.uuid4().hex
         try:
-            # 원본 파일 크기 확인
-            file.seek(0, 2)  # 파일 끝으로 이동
-            original_size_bytes = file.tell()
-            file.seek(0)  # 파일 시작으로 이동
-            original_size_mb = original_size_bytes / (1024 * 1024)
-            
-            print(f"📊 원본 이미지 크기: {original_size_mb:.1f}MB")
-            
-            # 고유 파일명 생성
-            filename = f"{uuid.uuid4().hex}_{int(datetime.now().timestamp())}.jpg"
-            
-            # 이미지 압축 (1MB 미만으로)
-            compressed_bytes, final_size_kb = compress_image_to_target_size(
-                file, 
-                max_size_mb=0.9,  # 1MB보다 약간 작게
-                max_width=800,    # 최대 800px 폭
-                quality=85        # 초기 품질
-            )
-            
-            if not compressed_bytes:
-                return jsonify({'success': False, 'message': '이미지 압축에 실패했습니다.'})
-            
-            # Supabase Storage에 업로드
-            supabase_url = upload_to_supabase_storage(compressed_bytes, filename)
-            
-            if supabase_url:
-                # 데이터베이스에 정보 저장
+            # Werkzeug가 받아 둔 임시 파일을 복사 없이 넘겨받음 (요청 종료 시 닫히지 않도록 분리)
+            upload, original_size_bytes = detach_upload(file)
+            print(f"📊 원본 이미지 크기: {original_size_bytes / (1024 * 1024):.1f}MB")
+
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            # 보관 기간이 지난 작업 기록 정리
+            cursor.execute("DELETE FROM photo_jobs WHERE created_at < (NOW() AT TIME ZONE 'Asia/Seoul') - %s::integer * INTERVAL '1 day'",
+                          (PHOTO_JOB_RETENTION_DAYS,))
+            cursor.execute('''INSERT INTO photo_jobs (id, inventory_id, original_name, original_size, created_by)
+                              SELECT %s, id, %s, %s, %s FROM inventory WHERE id = %s
+                              RETURNING id''',
+                          (job_id, file.filename, original_size_bytes, session['user_name'], item_id))
+            if not cursor.fetchone():
+                conn.rollback()
+                conn.close()
+                upload.close()
+                return jsonify({'success': False, 'message': '재고 아이템을 찾을 수 없습니다.'}), 404
+            conn.commit()
+            conn.close()
+
+            try:
+                photo_job_queue.submit({
+                    'id': job_id,
+                    'file': upload,
+                    'inventory_id': item_id,
+                    'filename': f"{uuid.uuid4().hex}_{int(datetime.now().timestamp())}.jpg",
+                    'original_name': file.filename,
+                    'original_size': original_size_bytes,
+                    'uploaded_by': session['user_name'],
+                })
+            except QueueFullError as e:
+                print(f"⚠️ 사진 업로드 거절: {e}")
+                upload.close()
                 conn = get_db_connection()
                 cursor = conn.cursor()
-                
-                cursor.execute('''INSERT INTO photos 
-                                (inventory_id, filename, original_name, file_size, uploaded_by, supabase_url) 
-                                VALUES (%s, %s, %s, %s, %s, %s)''',
-                              (item_id, filename, file.filename, int(final_size_kb), 
-                               session['user_name'], supabase_url))
-                
+                cursor.execute('DELETE FROM photo_jobs WHERE id = %s', (job_id,))
                 conn.commit()
                 conn.close()
-                
-                return jsonify({
-                    'success': True, 
-                    'message': f'사진이 업로드되었습니다. (원본: {original_size_mb:.1f}MB → 압축: {final_size_kb:.0f}KB)',
-                    'url': supabase_url,
-                    'original_size': f"{original_size_mb:.1f}MB",
-                    'compressed_size': f"{final_size_kb:.0f}KB"
-                })
-            else:
-                return jsonify({'success': False, 'message': 'Supabase Storage 업로드에 실패했습니다.'})
-                
+                return photo_queue_busy_response()
+
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': url_for('photo_job_status', job_id=job_id),
+                'message': '사진을 받았습니다. 압축 및 업로드를 진행합니다.',
+                'original_size': f"{original_size_bytes / (1024 * 1024):.1f}MB"
+            }), 202
+
         except Exception as e:
+            if upload is not None:
+                upload.close()
             print(f"❌ 사진 업로드 전체 오류: {e}")
             return jsonify({'success': False, 'message': f'사진 업로드 중 오류가 발생했습니다: {str(e)}'})
 
     return jsonify({'success': False, 'message': '지원하지 않는 파일 형식입니다.'})
 
+@app.route('/photo_jobs/<job_id>')
+def photo_job_status(job_id):
+    """사진 처리 작업 상태 조회 API (photos.html에서 주기적으로 확인)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''SELECT status, message, inventory_id, photo_id, file_size, supabase_url,
+                                 updated_at < (NOW() AT TIME ZONE 'Asia/Seoul') - %s::integer * INTERVAL '1 second'
+                          FROM photo_jobs WHERE id = %s''', (PHOTO_JOB_TIMEOUT, job_id))
+        row = cursor.fetchone()
+        conn.close()
+    except Exception as e:
+        print(f"❌ 사진 처리 상태 조회 오류: {e}")
+        return jsonify({'success': False, 'message': '작업 상태를 조회하지 못했습니다.'}), 500
+
+    if not row:
+        return jsonify({'success': False, 'message': '사진 처리 작업을 찾을 수 없습니다.'}), 404
+
+    status, message, inventory_id, photo_id, file_size, supabase_url, stale = row
+    # 처리 중 워커가 재시작되면 작업이 끝나지 않으므로 오래 멈춘 작업은 실패로 안내
+    if status in ('queued', 'processing') and stale:
+        status = 'failed'
+        message = '사진 처리가 중단되었습니다. 다시 업로드해 주세요.'
+
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': status,
+        'done': status in ('done', 'failed'),
+        'message': message,
+        'inventory_id': inventory_id,
+        'photo_id': photo_id,
+        'compressed_size': f"{file_size}KB" if file_size is not None else None,
+        'url': supabase_url
+    })
+
 @app.route('/photos/<int:item_id>')
 def view_photos(item_id):
     """사진 보기 페이지 - datetime 오류 완전 해결"""
@@ -1572,7 +2246,9 @@ def view_photos(item_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT id, filename, original_name, file_size, uploaded_by, uploaded_at, supabase_url FROM photos WHERE inventory_id = %s ORDER BY uploaded_at DESC', (item_id,))
+        cursor.execute('''SELECT id, filename, original_name, file_size, uploaded_by, uploaded_at, supabase_url,
+                                 thumbnail_url, medium_url
+                          FROM photos WHERE inventory_id = %s ORDER BY uploaded_at DESC''', (item_id,))
         raw_photos = cursor.fetchall()
         
         cursor.execute('SELECT part_name, warehouse, category FROM inventory WHERE id = %s', (item_id,))
@@ -1596,6 +2272,7 @@ def view_photos(item_id):
                              photos=photos, 
                              item_id=item_id, 
                              item_info=item_info,
+                             rendition_widths={name: width for name, (width, _) in RENDITIONS.items()},
                              is_admin=session.get('is_admin', False))
         
     except Exception as e:
@@ -1623,19 +2300,17 @@ def delete_photo(photo_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT filename, inventory_id, supabase_url FROM photos WHERE id = %s', (photo_id,))
+        cursor.execute('SELECT filename, inventory_id, supabase_url, thumbnail_url, medium_url FROM photos WHERE id = %s',
+                       (photo_id,))
         photo_info = cursor.fetchone()
         
         if photo_info:
-            filename, inventory_id, supabase_url = photo_info
+            filename, inventory_id, supabase_url, thumbnail_url, medium_url = photo_info
             
-            # Supabase Storage에서 파일 삭제 (선택사항)
+            # Supabase Storage에서 원본과 사본 삭제 (선택사항)
             if supabase_url:
                 try:
-                    delete_url = f"{SUPABASE_URL}/storage/v1/object/warehouse-photos/{filename}"
-                    headers = {'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}'}
-                    requests.delete(delete_url, headers=headers)
-                    print(f"✅ Supabase Storage에서 파일 삭제: {filename}")
+                    delete_from_supabase_storage(photo_storage_filenames(filename, thumbnail_url, medium_url))
                 except Exception as storage_error:
                     print(f"⚠️ Supabase Storage 파일 삭제 실패: {storage_error}")
             
@@ -1644,10 +2319,20 @@ def delete_photo(photo_id):
             if os.path.exists(file_path):
                 os.remove(file_path)
             
-            cursor.execute('DELETE FROM photos WHERE id = %s', (photo_id,))
+            # 동시에 삭제된 경우 중복 차감하지 않도록 실제 삭제된 경우에만 개수 감소
+            listing_key = None
+            cursor.execute('DELETE FROM photos WHERE id = %s RETURNING id', (photo_id,))
+            if cursor.fetchone():
+                cursor.execute('''UPDATE inventory SET photo_count = GREATEST(photo_count - 1, 0)
+                                  WHERE id = %s RETURNING warehouse, category''', (inventory_id,))
+                listing_key = cursor.fetchone()
+                if listing_key:
+                    notify_inventory_change(cursor, *listing_key)
             conn.commit()
             flash('사진이 삭제되었습니다.')
             conn.close()
+            if listing_key:
+                invalidate_inventory_listing(*listing_key)
             return redirect(f'/photos/{inventory_id}')
         else:
             flash('삭제할 사진을 찾을 수 없습니다.')
@@ -1661,6 +2346,138 @@ def delete_photo(photo_id):
     else:
         return redirect('/dashboard')
 
+@app.route('/api/parts/suggest')
+def suggest_part_names():
+    """부품명 자동완성 (입력할 때마다 호출, 초성/입력 중인 음절 지원)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+
+    query = request.args.get('q', '').strip()
+    warehouse = request.args.get('warehouse', '') or None
+    category = request.args.get('category', '') or None
+    try:
+        limit = min(max(int(request.args.get('limit', PART_SUGGEST_LIMIT)), 1), PART_SUGGEST_MAX_LIMIT)
+    except ValueError:
+        limit = PART_SUGGEST_LIMIT
+
+    if not query:
+        return jsonify({'success': True, 'query': query, 'suggestions': []})
+
+    try:
+        if part_name_index.loaded and _part_name_index_pid == os.getpid():
+            index = part_name_index
+        else:
+            conn = get_db_connection()
+            index = get_part_name_index(conn)
+            conn.close()
+        suggestions = index.suggest(query, warehouse, category, limit=limit)
+        return jsonify({
+            'success': True,
+            'query': query,
+            'suggestions': [{'part_name': name, 'count': count} for name, count in suggestions]
+        })
+    except Exception as e:
+        print(f"❌ 부품명 자동완성 오류: {e}")
+        return jsonify({'success': False, 'message': '자동완성 조회 중 오류가 발생했습니다.'}), 500
+
+def collect_search_matches(conn, query, warehouse):
+    """검색어와 일치하는 아이템 ID (관련도 순, 최대 SEARCH_RESULT_LIMIT개)"""
+    item_ids = []
+    if has_hangul(query):
+        # 초성("ㅊㅈㄱ")이나 입력 중인 음절("충저")은 자모 인덱스로 찾음
+        item_ids = get_part_name_index(conn).search(query, warehouse, limit=SEARCH_RESULT_LIMIT)
+    if len(item_ids) < SEARCH_RESULT_LIMIT:
+        # 대소문자/공백 무시 부분 일치 + 유사도 검색
+        found = set(item_ids)
+        for item_id in search_part_ids(conn, query, warehouse, limit=SEARCH_RESULT_LIMIT):
+            if item_id not in found and len(item_ids) < SEARCH_RESULT_LIMIT:
+                item_ids.append(item_id)
+    return item_ids
+
+def run_inventory_search(args):
+    """
+    재고 검색 한 페이지 조회 (HTML/JSON 검색 공용)
+
+    검색어가 있으면 관련도 순 ID 목록을 만든 뒤 페이지 단위로 잘라 조회하고,
+    창고만 지정하면 정렬 키 기준 키셋 페이지네이션으로 조회합니다.
+    """
+    query = args.get('q', '').strip()
+    warehouse = args.get('warehouse', '') or None
+    sort = args.get('sort', '')
+    if sort != 'relevance' and sort not in SORT_OPTIONS:
+        sort = 'relevance' if query else 'name'
+    if sort == 'relevance' and not query:
+        sort = 'name'
+    try:
+        per_page = min(max(int(args.get('per_page', SEARCH_PER_PAGE)), 1), 200)
+    except ValueError:
+        per_page = SEARCH_PER_PAGE
+    raw_cursor = decode_page_cursor(args.get('cursor'))
+
+    conn = get_db_connection()
+    try:
+        if query:
+            item_ids = collect_search_matches(conn, query, warehouse)
+            total_count = len(item_ids)
+            # 상한에 도달했으면 실제 일치 건수는 더 많을 수 있음
+            total_is_estimate = total_count >= SEARCH_RESULT_LIMIT
+        else:
+            item_ids = None
+            # 창고 전체 건수는 재고 요약 테이블에서 조회 (COUNT(*) 불필요)
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COALESCE(SUM(item_count), 0) FROM {INVENTORY_SUMMARY_SOURCE} WHERE warehouse = %s',
+                           (warehouse,))
+            total_count = cursor.fetchone()[0]
+            cursor.close()
+            total_is_estimate = False
+
+        next_cursor = None
+        if sort == 'relevance':
+            offset = 0
+            if raw_cursor and len(raw_cursor) == 1 and isinstance(raw_cursor[0], int):
+                offset = max(raw_cursor[0], 0)
+            rows = fetch_parts_by_ids(conn, item_ids[offset:offset + per_page])
+            if offset + per_page < len(item_ids):
+                next_cursor = encode_page_cursor([offset + per_page])
+        else:
+            after = None
+            if raw_cursor and len(raw_cursor) == 2:
+                try:
+                    value = raw_cursor[0]
+                    if sort == 'recent':
+                        value = datetime.fromisoformat(value)
+                    elif sort == 'quantity':
+                        value = int(value)
+                    after = (value, int(raw_cursor[1]))
+                except (TypeError, ValueError):
+                    after = None
+            rows = fetch_parts_page(conn, sort, after, per_page, warehouse, item_ids)
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_page_cursor(sort_cursor_values(sort, rows[-1]))
+    finally:
+        conn.close()
+
+    # 🔧 날짜 형식 변환 처리 (datetime 오류 해결)
+    inventory = []
+    for item in rows:
+        item_list = list(item)
+        if item_list[6] and not isinstance(item_list[6], str):
+            item_list[6] = item_list[6].strftime('%Y-%m-%d %H:%M:%S')
+        inventory.append(item_list)
+
+    return {
+        'inventory': inventory,
+        'query': query,
+        'warehouse': warehouse or '',
+        'sort': sort,
+        'per_page': per_page,
+        'total_count': total_count,
+        'total_count_is_estimate': total_is_estimate,
+        'next_cursor': next_cursor,
+        'is_first_page': raw_cursor is None,
+    }
+
 @app.route('/search_inventory')
 def search_inventory():
     """재고 검색 페이지 - 무한 리디렉션 및 datetime 오류 해결"""
@@ -1681,54 +2498,12 @@ def search_inventory():
                              is_admin=session.get('is_admin', False))
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        where_conditions = []
-        params = []
-        
-        if query:
-            where_conditions.append("i.part_name LIKE %s")
-            params.append(f'%{query}%')
-        
-        if warehouse:
-            where_conditions.append("i.warehouse = %s")
-            params.append(warehouse)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query_sql = f'''SELECT i.id, i.warehouse, i.category, i.part_name, i.quantity, 
-                              i.last_modifier, i.last_modified, COUNT(p.id) as photo_count
-                       FROM inventory i
-                       LEFT JOIN photos p ON i.id = p.inventory_id
-                       WHERE {where_clause}
-                       GROUP BY i.id, i.warehouse, i.category, i.part_name, i.quantity, i.last_modifier, i.last_modified
-                       ORDER BY i.warehouse, i.category, i.part_name'''
-        
-        cursor.execute(query_sql, params)
-        raw_inventory = cursor.fetchall()
-        conn.close()
-        
-        # 🔧 날짜 형식 변환 처리 (datetime 오류 해결)
-        inventory = []
-        for item in raw_inventory:
-            item_list = list(item)
-            if item_list[6]:  # last_modified가 존재하면
-                if isinstance(item_list[6], str):
-                    # 이미 문자열이면 그대로 사용
-                    pass
-                else:
-                    # datetime 객체면 문자열로 변환
-                    item_list[6] = item_list[6].strftime('%Y-%m-%d %H:%M:%S')
-            inventory.append(item_list)
-        
-        print(f"✅ 검색 결과: {len(inventory)}개 항목 발견")
+        result = run_inventory_search(request.args)
+        print(f"✅ 검색 결과: {result['total_count']}개 중 {len(result['inventory'])}개 표시")
         
         return render_template('search_results.html', 
-                             inventory=inventory, 
-                             query=query,
-                             warehouse=warehouse,
-                             is_admin=session.get('is_admin', False))
+                             is_admin=session.get('is_admin', False),
+                             **result)
         
     except Exception as e:
         print(f"❌ 검색 중 오류: {type(e).__name__}: {str(e)}")
@@ -1741,6 +2516,26 @@ def search_inventory():
                              is_admin=session.get('is_admin', False),
                              error_message=f'검색 중 오류가 발생했습니다: {str(e)}')
 
+@app.route('/api/search_inventory')
+def api_search_inventory():
+    """재고 검색 JSON (q, warehouse, sort=relevance|name|quantity|recent, per_page, cursor)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+
+    if not request.args.get('q', '').strip() and not request.args.get('warehouse'):
+        return jsonify({'success': False, 'message': '검색어 또는 창고를 지정해주세요.'}), 400
+
+    try:
+        result = run_inventory_search(request.args)
+        columns = ('id', 'warehouse', 'category', 'part_name', 'quantity',
+                   'last_modifier', 'last_modified', 'photo_count')
+        result['items'] = [dict(zip(columns, item)) for item in result.pop('inventory')]
+        result['success'] = True
+        return jsonify(result)
+    except Exception as e:
+        print(f"❌ 검색 API 오류: {type(e).__name__}: {str(e)}")
+        return jsonify({'success': False, 'message': '검색 중 오류가 발생했습니다.'}), 500
+
 @app.route('/delete_inventory/<int:item_id>')
 def delete_inventory(item_id):
     """재고 삭제 (관리자 전용)"""
@@ -1753,20 +2548,22 @@ def delete_inventory(item_id):
         cursor = conn.cursor()
         
         # 관련 사진들 삭제
-        cursor.execute('SELECT filename, supabase_url FROM photos WHERE inventory_id = %s', (item_id,))
+        cursor.execute('SELECT filename, supabase_url, thumbnail_url, medium_url FROM photos WHERE inventory_id = %s',
+                       (item_id,))
         photos = cursor.fetchall()
         
-        for photo in photos:
-            filename, supabase_url = photo
-            
-            # Supabase Storage에서 파일 삭제
+        # Supabase Storage에서 원본과 사본을 한 번에 삭제
+        storage_filenames = []
+        for filename, supabase_url, thumbnail_url, medium_url in photos:
             if supabase_url:
-                try:
-                    delete_url = f"{SUPABASE_URL}/storage/v1/object/warehouse-photos/{filename}"
-                    headers = {'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}'}
-                    requests.delete(delete_url, headers=headers)
-                except Exception as storage_error:
-                    print(f"⚠️ Supabase Storage 파일 삭제 실패: {storage_error}")
+                storage_filenames.extend(photo_storage_filenames(filename, thumbnail_url, medium_url))
+        try:
+            delete_from_supabase_storage(storage_filenames)
+        except Exception as storage_error:
+            print(f"⚠️ Supabase Storage 파일 삭제 실패: {storage_error}")
+        
+        for photo in photos:
+            filename = photo[0]
             
             # 로컬 파일 삭제 (호환성)
             file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -1775,12 +2572,21 @@ def delete_inventory(item_id):
         
         cursor.execute('DELETE FROM photos WHERE inventory_id = %s', (item_id,))
         cursor.execute('DELETE FROM inventory_history WHERE inventory_id = %s', (item_id,))
-        cursor.execute('SELECT warehouse, category FROM inventory WHERE id = %s', (item_id,))
-        item_info = cursor.fetchone()
-        cursor.execute('DELETE FROM inventory WHERE id = %s', (item_id,))
+        cursor.execute('DELETE FROM inventory_history_archive WHERE inventory_id = %s', (item_id,))
+        cursor.execute('DELETE FROM inventory WHERE id = %s RETURNING warehouse, category, quantity', (item_id,))
+        deleted = cursor.fetchone()
+        item_info = None
+        if deleted:
+            item_info = deleted[:2]
+            bump_inventory_summary(cursor, deleted[0], deleted[1], -1, -(deleted[2] or 0),
+                                   get_korea_time().strftime('%Y-%m-%d %H:%M:%S'))
+            notify_inventory_change(cursor, *item_info, op='delete', id=item_id)
         
         conn.commit()
         conn.close()
+        if item_info:
+            invalidate_inventory_listing(*item_info)
+            part_name_index.remove(item_id)
         
         flash('재고 아이템이 삭제되었습니다.')
         
@@ -1812,20 +2618,12 @@ def delete_receipt(receipt_id):
         cursor = conn.cursor()
         
         # 인수증 정보 조회 (창고명 확인용)
-        cursor.execute('SELECT items_data FROM delivery_receipts WHERE id = %s', (receipt_id,))
+        cursor.execute('SELECT warehouse FROM delivery_receipts WHERE id = %s', (receipt_id,))
         receipt_info = cursor.fetchone()
         
         if receipt_info:
-            # 창고명 추출
-            warehouse_name = "보라매창고"  # 기본값
-            try:
-                items_data = receipt_info[0]
-                if isinstance(items_data, str):
-                    parsed_data = json.loads(items_data)
-                    if isinstance(parsed_data, dict) and 'warehouse' in parsed_data:
-                        warehouse_name = parsed_data['warehouse']
-            except:
-                pass
+            # 창고명 (구 형식 인수증은 창고 정보가 없을 수 있음)
+            warehouse_name = receipt_info[0] or "보라매창고"
             
             # 인수증 삭제
             cursor.execute('DELETE FROM delivery_receipts WHERE id = %s', (receipt_id,))
@@ -1855,44 +2653,111 @@ def logout():
 
 @app.route('/inventory_history/<int:item_id>')
 def inventory_history(item_id):
-    """재고 이력 페이지 - 무한 리디렉션 및 datetime 오류 해결"""
+    """재고 이력 페이지 - 기간 필터 + 키셋 페이지네이션"""
     if 'user_id' not in session:
         return redirect('/')
 
+    start_date = parse_date_param(request.args.get('start_date'))
+    end_date = parse_date_param(request.args.get('end_date'))
+    direction = 'prev' if request.args.get('direction') == 'prev' else 'next'
+    per_page = min(max(request.args.get('per_page', HISTORY_PER_PAGE, type=int), 1), 200)
+
+    cursor_values = None
+    raw_cursor = decode_page_cursor(request.args.get('cursor'))
+    if raw_cursor and len(raw_cursor) == 2:
+        try:
+            cursor_values = [datetime.fromisoformat(raw_cursor[0]), int(raw_cursor[1])]
+        except (TypeError, ValueError):
+            cursor_values = None
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 재고 이력 조회
-        cursor.execute('''SELECT change_type, quantity_change, modifier_name, modified_at 
-                         FROM inventory_history 
-                         WHERE inventory_id = %s 
-                         ORDER BY modified_at DESC''', (item_id,))
+        # 기간 필터 ((inventory_id, modified_at) 인덱스 범위 조회)
+        where_conditions = ['inventory_id = %s']
+        filter_params = [item_id]
+        if start_date:
+            where_conditions.append('modified_at >= %s')
+            filter_params.append(start_date)
+        if end_date:
+            where_conditions.append('modified_at < %s')
+            filter_params.append(end_date + timedelta(days=1))
+        
+        page_conditions = list(where_conditions)
+        page_params = list(filter_params)
+        if cursor_values:
+            if direction == 'prev':
+                page_conditions.append('(modified_at, id) > (%s, %s)')
+            else:
+                page_conditions.append('(modified_at, id) < (%s, %s)')
+            page_params.extend(cursor_values)
+        
+        order = 'ASC' if direction == 'prev' else 'DESC'
+        
+        # 보관 기간 이전 범위를 조회할 때만 아카이브도 함께 조회
+        source = history_source(start_date is None or start_date < get_history_cutoff().date())
+        
+        # 재고 이력 조회 (다음 페이지 존재 여부 확인을 위해 1건 더 조회)
+        cursor.execute(f'''SELECT change_type, quantity_change, modifier_name,
+                                 to_char(modified_at, 'YYYY-MM-DD HH24:MI:SS'), modified_at, id
+                          FROM {source} 
+                          WHERE {' AND '.join(page_conditions)}
+                          ORDER BY modified_at {order}, id {order}
+                          LIMIT %s''', page_params + [per_page + 1])
         raw_history = cursor.fetchall()
         
+        # 기간 내 입고/출고 합계 요약
+        cursor.execute(f'''SELECT COUNT(*),
+                                 COALESCE(SUM(quantity_change) FILTER (WHERE quantity_change > 0), 0),
+                                 COALESCE(-SUM(quantity_change) FILTER (WHERE quantity_change < 0), 0)
+                          FROM {source}
+                          WHERE {' AND '.join(where_conditions)}''', filter_params)
+        total_count, total_in, total_out = cursor.fetchone()
+        
         # 재고 정보 조회
         cursor.execute('SELECT part_name, warehouse, category, quantity FROM inventory WHERE id = %s', (item_id,))
         item_info = cursor.fetchone()
         
         conn.close()
         
-        # 🔧 datetime 객체를 문자열로 변환 (오류 방지)
-        history = []
-        for record in raw_history:
-            record_list = list(record)
-            if record_list[3]:  # modified_at이 존재하면
-                if isinstance(record_list[3], str):
-                    # 이미 문자열이면 그대로 사용
-                    pass
-                else:
-                    # datetime 객체면 문자열로 변환
-                    record_list[3] = record_list[3].strftime('%Y-%m-%d %H:%M:%S')
-            history.append(record_list)
+        has_more = len(raw_history) > per_page
+        raw_history = raw_history[:per_page]
+        if direction == 'prev':
+            raw_history.reverse()
+        
+        # 이전/다음 페이지 커서
+        prev_cursor = next_cursor = None
+        if raw_history:
+            first_key = (raw_history[0][4], raw_history[0][5])
+            last_key = (raw_history[-1][4], raw_history[-1][5])
+            if direction == 'prev':
+                prev_cursor = encode_page_cursor(first_key) if has_more else None
+                next_cursor = encode_page_cursor(last_key)
+            else:
+                prev_cursor = encode_page_cursor(first_key) if cursor_values else None
+                next_cursor = encode_page_cursor(last_key) if has_more else None
+        
+        # 표시용 컬럼만 전달 (처리 일시는 SQL에서 문자열로 변환됨)
+        history = [list(record[:4]) for record in raw_history]
+        
+        summary = {
+            'count': total_count,
+            'total_in': total_in,
+            'total_out': total_out,
+            'net': total_in - total_out
+        }
         
         return render_template('inventory_history.html',
                              history=history,
                              item_info=item_info,
-                             item_id=item_id)
+                             item_id=item_id,
+                             summary=summary,
+                             start_date=start_date.isoformat() if start_date else '',
+                             end_date=end_date.isoformat() if end_date else '',
+                             per_page=per_page,
+                             next_cursor=next_cursor,
+                             prev_cursor=prev_cursor)
         
     except Exception as e:
         print(f"❌ 재고 이력 페이지 오류: {type(e).__name__}: {str(e)}")
@@ -1909,57 +2774,261 @@ def inventory_history(item_id):
         </html>
         '''
 
+INVENTORY_CATEGORIES = ['전기차', '기타']
+
+@app.route('/admin/import_inventory', methods=['POST'])
+def import_inventory():
+    """
+    재고 일괄 등록 (관리자 전용)
+    CSV/XLSX 헤더: 부품명, 수량 (필수) / 창고, 카테고리 (없으면 폼에서 선택한 값)
+    오류 행이 있으면 skip_invalid를 선택한 경우에만 나머지 행을 반영합니다.
+    """
+    if 'user_id' not in session or not session.get('is_admin'):
+        return jsonify({'success': False, 'message': '관리자 권한이 필요합니다.'}), 403
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'success': False, 'message': '업로드할 파일을 선택해주세요.'}), 400
+
+    add_quantity = request.form.get('mode') == 'add'
+    skip_invalid = request.form.get('skip_invalid') == '1'
+
+    try:
+        valid, errors, total = validate_import_rows(
+            read_import_rows(upload.filename, upload.stream),
+            default_warehouse=request.form.get('warehouse') or None,
+            default_category=request.form.get('category') or None,
+            warehouses=WAREHOUSES,
+            categories=INVENTORY_CATEGORIES)
+    except ImportFileError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    result = {
+        'total': total,
+        'valid': len(valid),
+        'error_count': len(errors),
+        'errors': errors[:MAX_REPORTED_ERRORS],
+        'inserted': 0,
+        'updated': 0,
+    }
+    if errors and not skip_invalid:
+        result.update(success=False, message=f'{len(errors)}개 행에 오류가 있어 반영하지 않았습니다.')
+        return jsonify(result), 400
+    if not valid:
+        result.update(success=False, message='반영할 행이 없습니다.')
+        return jsonify(result), 400
+
+    korea_time = get_korea_time().strftime('%Y-%m-%d %H:%M:%S')
+    affected_warehouses = sorted({row[1] for row in valid})
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        updated, inserted, inserted_items = apply_import(cursor, valid, add_quantity, session['user_name'], korea_time)
+        # 같은 트랜잭션에서 요약 재계산 및 다른 워커에 창고 전체 갱신 알림 (NOTIFY payload 크기 제한)
+        for warehouse_name in affected_warehouses:
+            refresh_inventory_summary(cursor, warehouse_name)
+            notify_inventory_change(cursor, warehouse_name, None, op='reload')
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"❌ 재고 일괄 등록 오류: {e}")
+        return jsonify({'success': False, 'message': f'일괄 등록 중 오류가 발생했습니다: {str(e)}'}), 500
+
+    for warehouse_name in affected_warehouses:
+        listing_cache.invalidate_where(lambda key, w=warehouse_name: key[0] == w)
+    for item_id, part_name, warehouse_name, category in inserted_items:
+        part_name_index.add(item_id, part_name, warehouse_name, category)
+
+    print(f"📥 재고 일괄 등록: 추가 {inserted}개, 갱신 {updated}개, 오류 {len(errors)}개")
+    result.update(success=True, inserted=inserted, updated=updated,
+                  message=f'{inserted}개 추가, {updated}개 갱신되었습니다.')
+    return jsonify(result)
+
+EXPORT_DATASETS = {
+    'inventory': '재고목록',
+    'history': '입출고이력',
+    'receipts': '인수증',
+}
+
+def build_export_query(dataset, warehouse=None, category=None, start_date=None, end_date=None):
+    """
+    내보내기 데이터셋별 (헤더, SQL, 파라미터)
+
+    날짜 범위는 재고는 최종 수정일, 이력은 변경일, 인수증은 인수증 일자 기준입니다.
+    """
+    conditions = []
+    params = []
+
+    if dataset == 'inventory':
+        if warehouse:
+            conditions.append('warehouse = %s')
+            params.append(warehouse)
+        if category:
+            conditions.append('category = %s')
+            params.append(category)
+        if start_date:
+            conditions.append('last_modified >= %s')
+            params.append(start_date)
+        if end_date:
+            conditions.append('last_modified < %s')
+            params.append(end_date + timedelta(days=1))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        header = ['창고', '카테고리', '부품명', '수량', '최종수정자', '최종수정일']
+        sql = f'''SELECT warehouse, category, part_name, quantity, last_modifier, last_modified
+                  FROM inventory {where}
+                  ORDER BY warehouse, category, part_name'''
+        return header, sql, params
+
+    if dataset == 'history':
+        if warehouse:
+            conditions.append('i.warehouse = %s')
+            params.append(warehouse)
+        if category:
+            conditions.append('i.category = %s')
+            params.append(category)
+        if start_date:
+            conditions.append('h.modified_at >= %s')
+            params.append(start_date)
+        if end_date:
+            conditions.append('h.modified_at < %s')
+            params.append(end_date + timedelta(days=1))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        # 보관 기간 이전 범위가 포함되면 아카이브도 함께 조회
+        include_archive = start_date is None or datetime.combine(start_date, datetime.min.time()) < get_history_cutoff()
+        header = ['변경일시', '창고', '카테고리', '부품명', '구분', '변경수량', '처리자']
+        sql = f'''SELECT h.modified_at, i.warehouse, i.category, i.part_name,
+                         CASE WHEN h.change_type = 'in' THEN '입고' WHEN h.change_type = 'out' THEN '출고'
+                              ELSE h.change_type END,
+                         h.quantity_change, h.modifier_name
+                  FROM {history_source(include_archive, alias='h')}
+                  JOIN inventory i ON i.id = h.inventory_id
+                  {where}
+                  ORDER BY h.modified_at, h.id'''
+        return header, sql, params
+
+    if dataset == 'receipts':
+        if warehouse:
+            conditions.append('warehouse = %s')
+            params.append(warehouse)
+        if start_date:
+            conditions.append('receipt_date >= %s')
+            params.append(start_date)
+        if end_date:
+            conditions.append('receipt_date <= %s')
+            params.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        header = ['인수증번호', '일자', '구분', '창고', '부품명', '수량',
+                  '인계부서', '인계자', '인수부서', '인수자', '목적', '작성자', '작성일시']
+        sql = f'''SELECT id, receipt_date, receipt_type, warehouse, COALESCE(items::text, items_data),
+                         created_by, created_at
+                  FROM delivery_receipts {where}
+                  ORDER BY receipt_date, created_at, id'''
+        return header, sql, params
+
+    raise ValueError(f'알 수 없는 데이터셋: {dataset}')
+
+def expand_receipt_rows(rows):
+    """인수증 행을 품목별 행으로 펼침"""
+    expanded = []
+    for receipt_id, receipt_date, receipt_type, warehouse, items_data, created_by, created_at in rows:
+        type_label = {'in': '입고', 'out': '출고'}.get(receipt_type, receipt_type)
+        raw_items, error_item = parse_receipt_items_data(items_data)
+        for item in (raw_items if raw_items is not None else [error_item]):
+            if not isinstance(item, dict):
+                item = {'part_name': str(item)}
+            expanded.append([
+                receipt_id, format_cell(receipt_date), type_label, warehouse,
+                item.get('part_name', item.get('name', '')),
+                item.get('quantity', item.get('qty', '')),
+                item.get('deliverer_dept', ''), item.get('deliverer_name', ''),
+                item.get('receiver_dept', ''), item.get('receiver_name', ''),
+                item.get('purpose', ''),
+                created_by, format_cell(created_at),
+            ])
+    return expanded
+
+def stream_export(dataset, export_format, warehouse=None, category=None, start_date=None, end_date=None):
+    """필터를 적용한 데이터셋을 CSV/XLSX 다운로드 응답으로 스트리밍"""
+    header, sql, params = build_export_query(dataset, warehouse, category, start_date, end_date)
+
+    conn = get_db_connection()
+    try:
+        # 쿼리 오류는 응답을 시작하기 전에 여기서 발생
+        rows = ServerCursor(conn, sql, params)
+    except Exception:
+        conn.close()
+        raise
+
+    chunks = rows.chunks()
+    if dataset == 'receipts':
+        chunks = (expand_receipt_rows(chunk) for chunk in chunks)
+
+    def generate():
+        try:
+            if export_format == 'xlsx':
+                yield from stream_xlsx(header, chunks, sheet_title=EXPORT_DATASETS[dataset])
+            else:
+                # UTF-8 BOM 포함 (Excel 한글 인식용)
+                yield from stream_csv(header, chunks)
+        finally:
+            rows.close()
+            conn.close()
+
+    name_parts = ['SK오앤에스', EXPORT_DATASETS[dataset]]
+    if warehouse:
+        name_parts.append(warehouse)
+    if category:
+        name_parts.append(category)
+    if start_date or end_date:
+        name_parts.append(f"{start_date or ''}~{end_date or ''}")
+    name_parts.append(datetime.now().strftime('%Y%m%d_%H%M%S'))
+    filename = f"{'_'.join(name_parts)}.{export_format}"
+    encoded_filename = urllib.parse.quote(filename, safe="")
+
+    mimetype = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                if export_format == 'xlsx' else 'text/csv')
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename*=UTF-8\'\'{encoded_filename}'
+        }
+    )
+
 @app.route('/export_inventory')
 def export_inventory():
-    """재고 데이터 내보내기 - 한글 인코딩 문제 완전 해결"""
+    """재고 데이터 내보내기 - 서버 측 커서로 일정 개수씩 읽어 CSV 스트리밍"""
+    return export_data('inventory')
+
+@app.route('/export/<dataset>')
+def export_data(dataset):
+    """
+    데이터 내보내기 (관리자 전용)
+    쿼리 파라미터: format=csv|xlsx, warehouse, category, start_date, end_date (YYYY-MM-DD)
+    """
     if 'user_id' not in session or not session.get('is_admin'):
         flash('관리자 권한이 필요합니다.')
         return redirect('/')
-    
+
+    if dataset not in EXPORT_DATASETS:
+        flash('지원하지 않는 내보내기 항목입니다.')
+        return redirect('/admin/dashboard')
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'xlsx'):
+        export_format = 'csv'
+    if export_format == 'xlsx' and not xlsx_available():
+        flash('엑셀(XLSX) 내보내기를 사용할 수 없습니다. CSV로 내보내 주세요.')
+        return redirect('/admin/dashboard')
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''SELECT warehouse, category, part_name, quantity, last_modifier, last_modified 
-                         FROM inventory 
-                         ORDER BY warehouse, category, part_name''')
-        inventory_data = cursor.fetchall()
-        conn.close()
-        
-        # 🔧 한글 인코딩 문제 해결: UTF-8 BOM 추가
-        output = io.StringIO()
-        
-        # UTF-8 BOM 추가 (Excel 한글 인식용)
-        output.write('\ufeff')  # BOM 추가
-        
-        writer = csv.writer(output)
-        
-        # 헤더 작성
-        writer.writerow(['창고', '카테고리', '부품명', '수량', '최종수정자', '최종수정일'])
-        
-        # 데이터 작성
-        for row in inventory_data:
-            # datetime 객체 처리
-            row_list = list(row)
-            if row_list[5] and not isinstance(row_list[5], str):
-                row_list[5] = row_list[5].strftime('%Y-%m-%d %H:%M:%S')
-            writer.writerow(row_list)
-        
-        # 파일 다운로드 응답 (UTF-8 BOM 포함)
-        filename = f'SK오앤에스_재고목록_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        encoded_filename = urllib.parse.quote(filename, safe="")
-        
-        response = Response(
-            output.getvalue().encode('utf-8-sig'),  # UTF-8 BOM 인코딩
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename*=UTF-8\'\'{encoded_filename}'
-            }
-        )
-        
-        return response
-        
+        return stream_export(dataset, export_format,
+                             warehouse=request.args.get('warehouse') or None,
+                             category=request.args.get('category') or None,
+                             start_date=parse_date_param(request.args.get('start_date')),
+                             end_date=parse_date_param(request.args.get('end_date')))
     except Exception as e:
+        print(f"❌ 데이터 내보내기 오류 ({dataset}): {e}")
         flash('데이터 내보내기 중 오류가 발생했습니다.')
         return redirect('/admin/dashboard')
 
@@ -1976,8 +3045,14 @@ def health():
             'status': 'healthy',
             'database': 'postgresql',
             'supabase_connected': True,
-            'storage_enabled': bool(SUPABASE_URL and SUPABASE_SERVICE_KEY),
+            'storage_enabled': storage_client.enabled,
+            'storage': storage_client.stats(),
             'email_enabled': bool(SMTP_USERNAME and SMTP_PASSWORD),
+            'db_pool': db_pool.stats(),
+            'listing_cache': listing_cache.stats(),
+            'cache_sync': change_listener.stats() if CACHE_SYNC_ENABLED else None,
+            'part_name_index': part_name_index.stats(),
+            'photo_jobs': photo_job_queue.stats(),
             'timestamp': datetime.now().isoformat(),
             'message': 'SK오앤에스 창고관리 시스템 (Supabase PostgreSQL + Storage + Email) 정상 작동 중'
         })
@@ -1986,6 +3061,7 @@ def health():
             'status': 'error',
             'database': 'postgresql',
             'supabase_connected': False,
+            'db_pool': db_pool.stats(),
             'timestamp': datetime.now().isoformat(),
             'message': f'Supabase 연결 오류: {str(e)}'
         }), 500
@@ -2047,6 +3123,7 @@ if __name__ == '__main__':
     print("🎯 최종 시스템 정보:")
     print(f"📱 포트: {port}")
     print(f"🗄️ 데이터베이스: PostgreSQL (Supabase)")
+    print(f"🔌 연결 풀: 최소 {DB_POOL_MIN_SIZE}개 / 최대 {DB_POOL_MAX_SIZE}개")
     print(f"📁 파일 저장: Supabase Storage + 이미지 압축")
     print(f"📧 이메일: {'설정됨' if SMTP_USERNAME else '미설정'}")
     print(f"🔒 보안: 관리자/사용자 권한 분리")
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+사진 압축 벤치마크
+기존 방식(전체 해상도 디코딩 + 품질 5씩 낮추며 반복 인코딩)과
+image_utils.compress_image_to_target_size의 업로드 1건당 CPU 시간을 비교합니다.
+
+사용법:
+    python bench_image_compression.py                 # 12MP 합성 사진으로 측정
+    python bench_image_compression.py a.jpg b.jpg     # 실제 사진으로 측정
+    python bench_image_compression.py --repeat 5 --max-size-mb 0.1
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from image_utils import compress_image_to_target_size
+
+
+def legacy_compress(image_file, max_size_mb=1, max_width=800, quality=85):
+    """기존 app.py 구현 (비교 기준)"""
+    img = Image.open(image_file)
+    if hasattr(img, '_getexif') and img._getexif() is not None:
+        orientation = img._getexif().get(274)
+        if orientation == 3:
+            img = img.rotate(180, expand=True)
+        elif orientation == 6:
+            img = img.rotate(270, expand=True)
+        elif orientation == 8:
+            img = img.rotate(90, expand=True)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size[0] > max_width:
+        ratio = max_width / img.size[0]
+        img = img.resize((max_width, int(img.size[1] * ratio)), Image.Resampling.LANCZOS)
+
+    max_size_bytes = max_size_mb * 1024 * 1024
+    current_quality = quality
+    encodes = 0
+    while current_quality > 20:
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=current_quality, optimize=True)
+        encodes += 1
+        if output.tell() <= max_size_bytes:
+            break
+        current_quality -= 5
+    return output.getvalue(), encodes
+
+
+def synthetic_phone_photo(width=4032, height=3024):
+    """세로로 찍은 12MP 휴대폰 사진과 비슷한 JPEG (EXIF 회전 6, 노이즈/경계 포함)"""
+    base = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), 40).convert('RGB')
+    img = Image.blend(base, noise, 0.35)
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, 160):
+        draw.rectangle([i, (i * 7) % height, i + 120, (i * 7) % height + 300],
+                       fill=((i * 3) % 255, (i * 5) % 255, (i * 11) % 255))
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=92, exif=exif)
+    return output.getvalue()
+
+
+def measure(label, func, data, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func(io.BytesIO(data))
+        times.append(time.process_time() - start)
+    return label, min(times), sum(times) / len(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='사진 압축 CPU 시간 비교')
+    parser.add_argument('files', nargs='*', help='측정할 JPEG 파일 (없으면 12MP 합성 사진)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-size-mb', type=float, default=0.9, help='목표 크기 (upload_photo 기본값 0.9)')
+    parser.add_argument('--max-width', type=int, default=800)
+    args = parser.parse_args()
+
+    samples = []
+    for path in args.files:
+        with open(path, 'rb') as f:
+            samples.append((os.path.basename(path), f.read()))
+    if not samples:
+        samples.append(('synthetic-12MP', synthetic_phone_photo()))
+
+    for name, data in samples:
+        with Image.open(io.BytesIO(data)) as probe:
+            print(f"\n📷 {name}: {probe.size[0]}x{probe.size[1]}, {len(data) / 1024 / 1024:.1f}MB, "
+                  f"목표 {args.max_size_mb}MB / 가로 {args.max_width}px")
+
+        rows = [
+            measure('기존', lambda f: legacy_compress(f, args.max_size_mb, args.max_width), data, args.repeat),
+            measure('개선', lambda f: (compress_image_to_target_size(f, args.max_size_mb, args.max_width)[0], None),
+                    data, args.repeat),
+        ]
+        baseline = rows[0][1]
+        for label, best, mean, (output, encodes) in rows:
+            with Image.open(io.BytesIO(output)) as result_img:
+                size = result_img.size
+            encode_info = f", 인코딩 {encodes}회" if encodes else ''
+            print(f"  {label}: 최소 {best * 1000:7.1f}ms, 평균 {mean * 1000:7.1f}ms (x{baseline / best:.1f}) "
+                  f"→ {len(output) / 1024:.0f}KB, {size[0]}x{size[1]}{encode_info}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
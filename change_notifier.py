@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+워커 간 재고 변경 알림
+재고를 변경한 트랜잭션 안에서 PostgreSQL NOTIFY를 보내고, 각 워커의 리스너
+스레드가 이를 받아 프로세스 메모리의 캐시를 무효화합니다.
+NOTIFY는 커밋될 때만 전달되므로 롤백된 변경은 알리지 않습니다.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+
+CHANNEL = 'inventory_changes'
+
+
+def process_origin():
+    """알림을 보낸 프로세스 식별자 (자기 자신이 보낸 알림은 건너뛰기 위함)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def publish_change(cursor, warehouse, category, **extra):
+    """현재 트랜잭션에 재고 변경 알림 추가 (커밋 시 전달)"""
+    payload = {'w': warehouse, 'c': category, 'o': process_origin()}
+    payload.update(extra)
+    cursor.execute('SELECT pg_notify(%s, %s)', (CHANNEL, json.dumps(payload, ensure_ascii=False)))
+
+
+class ChangeListener:
+    """
+    전용 연결로 LISTEN 하면서 알림을 처리하는 백그라운드 스레드
+
+    pg8000은 서버 메시지를 읽을 때만 알림을 수신하므로 poll_interval마다
+    가벼운 쿼리를 실행해 쌓인 알림을 가져옵니다.
+
+    Args:
+        connect: 새 DB 연결을 만드는 함수 (풀과 별개의 전용 연결)
+        on_change: 알림 payload(dict)를 받는 함수
+        on_reconnect: 연결이 끊겼다가 다시 연결되었을 때 호출 (누락된 알림 대비 전체 무효화 등)
+        poll_interval: 알림 확인 주기 (초)
+    """
+
+    def __init__(self, connect, on_change, on_reconnect=None, poll_interval=1.0):
+        self._connect = connect
+        self._on_change = on_change
+        self._on_reconnect = on_reconnect
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._counters = {'received': 0, 'skipped_own': 0, 'errors': 0, 'reconnects': 0}
+
+    def start(self):
+        """현재 프로세스에서 리스너 스레드가 없으면 시작 (fork 이후에도 안전)"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='inventory-change-listener', daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        conn = self._connect()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f'LISTEN {CHANNEL}')
+        return conn, cursor
+
+    def _run(self):
+        conn = None
+        cursor = None
+        retry_delay = self.poll_interval
+        missed_notifications = False
+        origin = process_origin()
+        while True:
+            try:
+                if conn is None:
+                    conn, cursor = self._listen()
+                    if missed_notifications:
+                        self._counters['reconnects'] += 1
+                        if self._on_reconnect:
+                            self._on_reconnect()
+                    missed_notifications = False
+                    retry_delay = self.poll_interval
+
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+                while conn.notifications:
+                    _, channel, payload = conn.notifications.popleft()
+                    if channel != CHANNEL:
+                        continue
+                    try:
+                        change = json.loads(payload)
+                    except ValueError:
+                        continue
+                    if change.get('o') == origin:
+                        self._counters['skipped_own'] += 1
+                        continue
+                    self._counters['received'] += 1
+                    self._on_change(change)
+
+                time.sleep(self.poll_interval)
+            except Exception as e:
+                self._counters['errors'] += 1
+                missed_notifications = True
+                print(f"⚠️ 재고 변경 리스너 오류 (재연결 예정): {e}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                conn = None
+                cursor = None
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+
+    def stats(self):
+        """모니터링용 리스너 통계"""
+        stats = dict(self._counters)
+        stats['running'] = bool(self._thread and self._thread.is_alive() and self._pid == os.getpid())
+        return stats
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+PostgreSQL 연결 풀
+워커 프로세스마다 pg8000 연결을 재사용하여 요청마다 반복되던
+TCP/TLS/인증 핸드셰이크 비용을 없앱니다.
+"""
+
+import os
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+    """제한 시간 안에 풀에서 연결을 얻지 못했을 때 발생합니다."""
+
+
+class _PoolEntry:
+    """풀이 관리하는 실제 연결과 사용 기록"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class PooledConnection:
+    """
+    풀에서 빌려준 연결 래퍼
+    cursor()/commit()/rollback() 등은 실제 연결로 위임되고,
+    close()는 연결을 닫지 않고 풀에 반납합니다.
+    """
+
+    def __init__(self, pool, entry):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+        object.__setattr__(self, '_returned', False)
+        object.__setattr__(self, '_broken', False)
+
+    def __getattr__(self, name):
+        if self._returned:
+            raise AttributeError(f"이미 풀에 반납된 연결입니다: {name}")
+        return getattr(self._entry.raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._entry.raw, name, value)
+
+    @property
+    def closed(self):
+        return self._returned
+
+    def discard(self):
+        """연결이 손상되었음을 표시합니다. 반납 시 재사용하지 않고 닫습니다."""
+        object.__setattr__(self, '_broken', True)
+
+    def close(self):
+        """풀에 연결 반납 (여러 번 호출해도 안전)"""
+        if self._returned:
+            return
+        object.__setattr__(self, '_returned', True)
+        self._pool._release(self._entry, broken=self._broken)
+
+
+class ConnectionPool:
+    """
+    프로세스 단위 연결 풀
+
+    Args:
+        connect: 새 DB-API 연결을 만드는 함수
+        min_size: 유휴 상태에서도 유지할 최소 연결 수
+        max_size: 동시에 열 수 있는 최대 연결 수
+        idle_timeout: 최소 연결 수를 넘는 유휴 연결을 닫기까지의 시간 (초)
+        max_uses: 이 횟수만큼 대여된 연결은 반납 시 새 연결로 교체
+        health_check_interval: 이 시간(초) 이상 유휴였던 연결은 대여 전 SELECT 1 확인 (0이면 항상)
+        acquire_timeout: 풀이 가득 찼을 때 연결을 기다리는 최대 시간 (초)
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300,
+                 max_uses=1000, health_check_interval=30, acquire_timeout=10):
+        if max_size < 1:
+            raise ValueError("max_size는 1 이상이어야 합니다.")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self._counters = {
+            'acquired': 0,
+            'created': 0,
+            'closed': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'peak_in_use': 0,
+        }
+
+    def _check_pid(self):
+        """fork된 워커에서 부모 프로세스의 소켓을 공유하지 않도록 상태를 초기화"""
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def _close_raw(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _ping(self, raw):
+        cursor = raw.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        raw.rollback()
+
+    def _reap_idle_locked(self, now):
+        """idle_timeout을 넘긴 유휴 연결 정리 (min_size는 유지)"""
+        expired = []
+        keep = []
+        for entry in self._idle:
+            if (self._size - len(expired) > self.min_size
+                    and now - entry.last_used > self.idle_timeout):
+                expired.append(entry)
+            else:
+                keep.append(entry)
+        self._idle = keep
+        self._size -= len(expired)
+        self._counters['closed'] += len(expired)
+        return expired
+
+    def prewarm(self):
+        """min_size만큼 연결을 미리 생성"""
+        with self._lock:
+            self._check_pid()
+            missing = self.min_size - self._size
+            self._size += max(0, missing)
+        for _ in range(max(0, missing)):
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._available.notify()
+                raise
+            with self._lock:
+                self._counters['created'] += 1
+                self._idle.append(entry)
+                self._available.notify()
+
+    def acquire(self):
+        """풀에서 연결을 빌려옵니다. 필요하면 새로 만들고, 가득 차면 대기합니다."""
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            entry = None
+            create = False
+            with self._lock:
+                self._check_pid()
+                expired = self._reap_idle_locked(time.monotonic())
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"연결 풀 대기 시간 초과 ({self.acquire_timeout}초, 최대 {self.max_size}개 사용 중)")
+                    self._counters['waits'] += 1
+                    self._available.wait(remaining)
+                if self._idle:
+                    # 최근에 반납된 연결부터 사용 (LIFO)
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+                self._in_use += 1
+
+            for stale in expired:
+                self._close_raw(stale)
+
+            if create:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+                with self._lock:
+                    self._counters['created'] += 1
+            elif time.monotonic() - entry.last_used >= self.health_check_interval:
+                try:
+                    self._ping(entry.raw)
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._counters['health_check_failures'] += 1
+                        self._counters['closed'] += 1
+                        self._available.notify()
+                    self._close_raw(entry)
+                    continue
+
+            entry.uses += 1
+            with self._lock:
+                self._counters['acquired'] += 1
+                self._counters['peak_in_use'] = max(self._counters['peak_in_use'], self._in_use)
+            return PooledConnection(self, entry)
+
+    def _release(self, entry, broken=False):
+        if not broken:
+            # 커밋되지 않은 작업은 버리고 깨끗한 상태로 반납
+            try:
+                entry.raw.rollback()
+            except Exception:
+                broken = True
+
+        recycle = not broken and self.max_uses and entry.uses >= self.max_uses
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 이전에 빌려간 연결: 현재 프로세스의 풀과 무관
+                return
+            self._in_use -= 1
+            if broken or recycle:
+                self._size -= 1
+                self._counters['closed'] += 1
+                if recycle:
+                    self._counters['recycled'] += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._available.notify()
+
+        if broken or recycle:
+            self._close_raw(entry)
+
+    def close_all(self):
+        """유휴 연결을 모두 닫습니다 (사용 중인 연결은 반납 시 정리됨)"""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+            self._size -= len(idle)
+            self._counters['closed'] += len(idle)
+        for entry in idle:
+            self._close_raw(entry)
+
+    def stats(self):
+        """모니터링용 풀 통계"""
+        with self._lock:
+            stats = {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+            }
+            stats.update(self._counters)
+        return stats
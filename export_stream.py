@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+대용량 내보내기 스트리밍
+서버 측 커서(DECLARE/FETCH)로 일정 개수씩 행을 가져와 바로 CSV로 인코딩해 내보내므로
+데이터 크기와 관계없이 메모리 사용량이 일정하고, 첫 바이트가 즉시 전송됩니다.
+엑셀(XLSX)은 openpyxl write-only 모드로 임시 파일에 행 단위로 기록한 뒤 나누어 전송합니다.
+수식으로 해석될 수 있는 문자열 셀은 CSV에서는 앞에 '를 붙이고, 엑셀에서는 문자열 셀로 지정합니다 (수식 주입 방지).
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+except ImportError:  # openpyxl 미설치 시 XLSX 내보내기만 비활성화
+    Workbook = None
+
+EXPORT_CHUNK_SIZE = 1000
+
+# 스프레드시트가 수식으로 해석하는 셀 시작 문자
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ServerCursor:
+    """
+    DECLARE로 연 서버 측 커서
+
+    생성 시 쿼리를 실행(DECLARE)하므로 SQL 오류는 응답을 보내기 전에 드러납니다.
+    반복하면 chunk_size개씩 FETCH 하며, 끝까지 읽거나 close() 하면 트랜잭션을 정리합니다.
+
+    Args:
+        conn: autocommit이 꺼진 DB 연결 (커서는 트랜잭션 안에서만 유지됨)
+        sql: 조회 쿼리
+        params: 쿼리 파라미터
+        chunk_size: 한 번에 가져올 행 수
+        name: 서버 측 커서 이름
+    """
+
+    def __init__(self, conn, sql, params=(), chunk_size=EXPORT_CHUNK_SIZE, name='export_cursor'):
+        self._conn = conn
+        self._name = name
+        self.chunk_size = chunk_size
+        self._cursor = conn.cursor()
+        self._closed = False
+        try:
+            self._cursor.execute(f'DECLARE {name} NO SCROLL CURSOR FOR {sql}', list(params))
+        except Exception:
+            self.close()
+            raise
+
+    def chunks(self):
+        """chunk_size개씩 행 목록 반환"""
+        try:
+            while True:
+                self._cursor.execute(f'FETCH FORWARD {int(self.chunk_size)} FROM {self._name}')
+                rows = self._cursor.fetchall()
+                if not rows:
+                    break
+                yield rows
+        finally:
+            self.close()
+
+    def __iter__(self):
+        for rows in self.chunks():
+            yield from rows
+
+    def close(self):
+        """커서 정리 (읽기 전용이므로 롤백으로 종료)"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._cursor.close()
+        except Exception:
+            pass
+        try:
+            self._conn.rollback()
+        except Exception:
+            pass
+
+
+def format_cell(value):
+    """CSV/엑셀 셀 값 변환 (날짜는 문자열로)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def escape_formula(value):
+    """CSV용: 수식으로 해석될 수 있는 문자열 앞에 ' 추가 (숫자/날짜 값은 그대로)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def unescape_formula(value):
+    """escape_formula로 붙인 ' 하나 제거 (내보낸 CSV를 다시 가져올 때)"""
+    if isinstance(value, str) and value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def _xlsx_cell(sheet, value):
+    """
+    엑셀 셀 값 변환
+
+    엑셀 셀은 형식이 정해져 있어 openpyxl이 수식으로 저장하는 '='로 시작하는 문자열만
+    문자열 셀(' 접두 표시)로 지정하고, 나머지 값은 그대로 씁니다.
+    """
+    if isinstance(value, str) and value.startswith('='):
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = 's'
+        cell.quotePrefix = True
+        return cell
+    return value
+
+
+def stream_csv(header, row_chunks, format_row=None):
+    """
+    CSV 바이트 스트림 생성
+
+    Args:
+        header: 헤더 행
+        row_chunks: 행 목록을 차례로 내는 반복자 (예: ServerCursor.chunks())
+        format_row: 행 변환 함수 (None이면 날짜만 문자열로 변환)
+
+    Yields:
+        UTF-8 바이트 (첫 조각에 엑셀 한글 인식용 BOM 포함)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    yield drain()
+
+    for rows in row_chunks:
+        for row in rows:
+            cells = format_row(row) if format_row else [format_cell(value) for value in row]
+            writer.writerow([escape_formula(cell) for cell in cells])
+        yield drain()
+
+
+def xlsx_available():
+    """XLSX 내보내기 가능 여부 (openpyxl 설치 여부)"""
+    return Workbook is not None
+
+
+def stream_xlsx(header, row_chunks, sheet_title='Sheet1', read_size=64 * 1024):
+    """
+    XLSX 바이트 스트림 생성
+
+    XLSX는 zip 형식이라 마지막에 목차를 써야 하므로, write-only 워크북으로
+    임시 파일에 기록한 뒤 read_size 단위로 읽어 보냅니다. 행은 메모리에 쌓이지 않습니다.
+
+    Args:
+        header: 헤더 행
+        row_chunks: 행 목록을 차례로 내는 반복자
+        sheet_title: 시트 이름
+        read_size: 전송 단위 (바이트)
+    """
+    if Workbook is None:
+        raise RuntimeError('openpyxl이 설치되어 있지 않아 XLSX로 내보낼 수 없습니다.')
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(header)
+    for rows in row_chunks:
+        for row in rows:
+            sheet.append([_xlsx_cell(sheet, value) for value in row])
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            data = output.read(read_size)
+            if not data:
+                break
+            yield data
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+한글 부품명 검색 인덱스
+부품명을 자모와 초성으로 분해해 프로세스 메모리에 보관하고,
+"ㅊㅈㄱ"(초성)이나 "충저"(입력 중인 음절) 같은 검색어도 접두/부분 일치로 찾습니다.
+자모/초성 문자열의 1글자, 2글자 조각별 역색인을 사용하므로 전체 부품을 훑지 않습니다.
+자동완성용으로 (창고, 카테고리)별 정렬된 자모/초성 키 목록도 함께 유지합니다.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_JUNGSEONG = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅗㅏ', 'ㅗㅐ', 'ㅗㅣ', 'ㅛ',
+              'ㅜ', 'ㅜㅓ', 'ㅜㅔ', 'ㅜㅣ', 'ㅠ', 'ㅡ', 'ㅡㅣ', 'ㅣ']
+_JONGSEONG = ['', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ',
+              'ㄹㅌ', 'ㄹㅍ', 'ㄹㅎ', 'ㅁ', 'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+
+# 키보드로 직접 입력한 겹자모 (예: "ㄺ", "ㅘ")도 음절 분해 결과와 같은 형태로 풀어 씀
+_COMPOUND_JAMO = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+
+# 한글 호환 자모 범위 (ㄱ ~ ㅣ), 자음은 ㄱ ~ ㅎ
+_JAMO_RANGE = (0x3131, 0x3163)
+_CONSONANT_RANGE = (0x3131, 0x314E)
+
+
+def normalize(text):
+    """대소문자/공백 무시 비교용 정규화"""
+    return re.sub(r'\s+', '', text or '').lower()
+
+
+def _is_syllable(ch):
+    return _HANGUL_BASE <= ord(ch) <= _HANGUL_LAST
+
+
+def has_hangul(text):
+    """한글 음절이나 자모가 포함되어 있는지"""
+    return any(_is_syllable(ch) or _JAMO_RANGE[0] <= ord(ch) <= _JAMO_RANGE[1] for ch in text or '')
+
+
+def is_choseong_query(text):
+    """자음만으로 된 검색어인지 (예: "ㅊㅈㄱ", 숫자/영문 혼용 허용)"""
+    key = normalize(text)
+    has_consonant = False
+    for ch in key:
+        code = ord(ch)
+        if _CONSONANT_RANGE[0] <= code <= _CONSONANT_RANGE[1]:
+            has_consonant = True
+        elif _is_syllable(ch) or _JAMO_RANGE[0] <= code <= _JAMO_RANGE[1]:
+            return False
+    return has_consonant
+
+
+def to_jamo(text):
+    """정규화된 문자열을 자모 단위로 분해 ("충전기" -> "ㅊㅜㅇㅈㅓㄴㄱㅣ")"""
+    parts = []
+    for ch in text:
+        if _is_syllable(ch):
+            offset = ord(ch) - _HANGUL_BASE
+            parts.append(_CHOSEONG[offset // 588])
+            parts.append(_JUNGSEONG[(offset % 588) // 28])
+            parts.append(_JONGSEONG[offset % 28])
+        else:
+            parts.append(_COMPOUND_JAMO.get(ch, ch))
+    return ''.join(parts)
+
+
+def to_choseong(text):
+    """정규화된 문자열의 초성 ("충전기" -> "ㅊㅈㄱ", 한글이 아닌 문자는 그대로)"""
+    return ''.join(_CHOSEONG[(ord(ch) - _HANGUL_BASE) // 588] if _is_syllable(ch) else ch
+                   for ch in text)
+
+
+def _grams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class _Postings:
+    """자모 또는 초성 문자열의 1~2글자 조각 -> 아이템 ID 집합"""
+
+    def __init__(self):
+        self.grams = {}
+
+    def add(self, item_id, text):
+        for gram in _grams(text):
+            self.grams.setdefault(gram, set()).add(item_id)
+
+    def remove(self, item_id, text):
+        for gram in _grams(text):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def candidates(self, key):
+        """key를 포함할 수 있는 아이템 ID (실제 포함 여부는 호출 측에서 확인)"""
+        if len(key) == 1:
+            return set(self.grams.get(key, ()))
+        sets = []
+        for i in range(len(key) - 1):
+            ids = self.grams.get(key[i:i + 2])
+            if not ids:
+                return set()
+            sets.append(ids)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+
+class _PrefixList:
+    """(키, 부품명, 아이템 ID) 정렬 목록, 접두사 범위를 이진 탐색으로 찾음"""
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, entry, keep_sorted=True):
+        if keep_sorted:
+            bisect.insort(self.entries, entry)
+        else:
+            self.entries.append(entry)
+
+    def remove(self, entry):
+        i = bisect.bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            del self.entries[i]
+
+    def iter_prefix(self, prefix):
+        i = bisect.bisect_left(self.entries, (prefix,))
+        while i < len(self.entries) and self.entries[i][0].startswith(prefix):
+            yield self.entries[i]
+            i += 1
+
+
+class HangulIndex:
+    """
+    부품명 자모/초성 인덱스
+
+    load()로 전체를 한 번 적재한 뒤 add()/remove()로 변경분만 반영합니다.
+    적재 도중 들어온 변경도 적재 완료 후 다시 적용되어 누락되지 않습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reset_locked()
+        self._pending = None
+        self.loaded = False
+
+    def _reset_locked(self):
+        self._items = {}
+        self._jamo = _Postings()
+        self._choseong = _Postings()
+        # (창고, 카테고리) -> (자모 키 목록, 초성 키 목록)
+        self._prefixes = {}
+
+    def _add_locked(self, item_id, part_name, warehouse, category, keep_sorted=True):
+        self._remove_locked(item_id)
+        key = normalize(part_name)
+        entry = (part_name, warehouse, category, key, to_jamo(key), to_choseong(key))
+        self._items[item_id] = entry
+        self._jamo.add(item_id, entry[4])
+        self._choseong.add(item_id, entry[5])
+        jamo_list, choseong_list = self._prefixes.setdefault((warehouse, category), (_PrefixList(), _PrefixList()))
+        jamo_list.add((entry[4], part_name, item_id), keep_sorted)
+        choseong_list.add((entry[5], part_name, item_id), keep_sorted)
+
+    def _remove_locked(self, item_id):
+        entry = self._items.pop(item_id, None)
+        if entry is not None:
+            part_name, warehouse, category, _, jamo, choseong = entry
+            self._jamo.remove(item_id, jamo)
+            self._choseong.remove(item_id, choseong)
+            jamo_list, choseong_list = self._prefixes[(warehouse, category)]
+            jamo_list.remove((jamo, part_name, item_id))
+            choseong_list.remove((choseong, part_name, item_id))
+
+    def load(self, fetch_rows):
+        """
+        전체 재적재
+
+        Args:
+            fetch_rows: (id, part_name, warehouse, category) 목록을 반환하는 함수
+        """
+        with self._load_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                rows = fetch_rows()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                self._reset_locked()
+                for item_id, part_name, warehouse, category in rows:
+                    self._add_locked(item_id, part_name, warehouse, category, keep_sorted=False)
+                for jamo_list, choseong_list in self._prefixes.values():
+                    jamo_list.entries.sort()
+                    choseong_list.entries.sort()
+                # 조회 이후에 반영된 변경 다시 적용
+                for op, args in self._pending:
+                    if op == 'add':
+                        self._add_locked(*args)
+                    else:
+                        self._remove_locked(*args)
+                self._pending = None
+                self.loaded = True
+
+    def invalidate(self):
+        """다음 조회 때 다시 적재하도록 표시 (변경 알림 누락 가능성이 있을 때)"""
+        with self._lock:
+            self.loaded = False
+
+    def add(self, item_id, part_name, warehouse=None, category=None):
+        """아이템 추가 또는 이름 변경 반영"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('add', (item_id, part_name, warehouse, category)))
+            self._add_locked(item_id, part_name, warehouse, category)
+
+    def remove(self, item_id):
+        """아이템 삭제 반영"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('remove', (item_id,)))
+            self._remove_locked(item_id)
+
+    def search(self, query, warehouse=None, category=None, limit=50):
+        """
+        자모/초성 접두·부분 일치 검색
+
+        Returns:
+            item_ids: 부품명 접두 일치 > 부분 일치 > 자모 접두/부분 일치 > 초성 접두/부분 일치 순,
+                      같은 순위에서는 짧은 이름 우선
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        jamo_key = to_jamo(key)
+        choseong_query = is_choseong_query(key)
+
+        ranked = []
+        with self._lock:
+            candidates = self._jamo.candidates(jamo_key)
+            if choseong_query:
+                candidates |= self._choseong.candidates(key)
+            for item_id in candidates:
+                part_name, item_warehouse, item_category, name_key, jamo, choseong = self._items[item_id]
+                if warehouse and item_warehouse != warehouse:
+                    continue
+                if category and item_category != category:
+                    continue
+                if name_key.startswith(key):
+                    rank = 0
+                elif key in name_key:
+                    rank = 1
+                elif jamo.startswith(jamo_key):
+                    rank = 2
+                elif jamo_key in jamo:
+                    rank = 3
+                elif choseong_query and choseong.startswith(key):
+                    rank = 4
+                elif choseong_query and key in choseong:
+                    rank = 5
+                else:
+                    continue
+                ranked.append((rank, len(name_key), part_name, item_id))
+        return [item_id for _, _, _, item_id in heapq.nsmallest(limit, ranked)]
+
+    def suggest(self, prefix, warehouse=None, category=None, limit=10):
+        """
+        자동완성용 부품명 접두 일치 (같은 이름은 한 번만)
+
+        Returns:
+            suggestions: [(부품명, 같은 이름의 아이템 수)] 자모 순
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+        choseong_query = is_choseong_query(key)
+        search_key = key if choseong_query else to_jamo(key)
+
+        suggestions = {}
+        with self._lock:
+            lists = [lists[1] if choseong_query else lists[0]
+                     for scope, lists in self._prefixes.items()
+                     if (not warehouse or scope[0] == warehouse) and (not category or scope[1] == category)]
+            # 범위별 정렬 목록을 병합하며 limit개가 모이면 바로 중단
+            merged = heapq.merge(*[prefix_list.iter_prefix(search_key) for prefix_list in lists])
+            for _, part_name, _ in merged:
+                name_key = normalize(part_name)
+                if name_key in suggestions:
+                    suggestions[name_key][1] += 1
+                elif len(suggestions) < limit:
+                    suggestions[name_key] = [part_name, 1]
+                else:
+                    break
+        return [tuple(value) for value in suggestions.values()]
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        """모니터링용 인덱스 통계"""
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'items': len(self._items),
+                'jamo_grams': len(self._jamo.grams),
+                'choseong_grams': len(self._choseong.grams),
+                'prefix_scopes': len(self._prefixes),
+            }
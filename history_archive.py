@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+재고 이력 보관 정책
+보관 기간(SecurityConfig.HISTORY_RETENTION_DAYS)이 지난 inventory_history 행을
+월별 파티션으로 나뉜 inventory_history_archive 테이블로 일정 크기씩 옮깁니다.
+"""
+
+from datetime import datetime
+
+# 동시에 한 프로세스만 아카이브 작업을 하도록 사용하는 advisory lock 키
+ARCHIVE_LOCK_KEY = 7283002
+
+HISTORY_COLUMNS = 'id, inventory_id, change_type, quantity_change, modifier_name, modified_at'
+
+# 운영 이력과 아카이브를 함께 조회하는 서브쿼리 (WHERE 조건은 양쪽 인덱스로 전달됨)
+HISTORY_WITH_ARCHIVE = (f'(SELECT {HISTORY_COLUMNS} FROM inventory_history '
+                        f'UNION ALL SELECT {HISTORY_COLUMNS} FROM inventory_history_archive)')
+
+
+def history_source(include_archive, alias='inventory_history'):
+    """이력 조회용 FROM 절 (보관 기간 이전 범위를 조회할 때만 아카이브 포함)"""
+    if include_archive:
+        return f'{HISTORY_WITH_ARCHIVE} AS {alias}'
+    return f'inventory_history AS {alias}'
+
+
+def _partition_name(month_start):
+    return f"inventory_history_archive_y{month_start.year:04d}m{month_start.month:02d}"
+
+
+def _next_month(month_start):
+    if month_start.month == 12:
+        return datetime(month_start.year + 1, 1, 1)
+    return datetime(month_start.year, month_start.month + 1, 1)
+
+
+def _ensure_month_partitions(cursor, timestamps):
+    """
+    이번 배치에서 옮길 이력이 속한 월의 아카이브 파티션만 생성
+    (잘못 입력된 아주 오래된 일시가 있어도 그 사이 월을 모두 만들지 않음)
+    """
+    months = sorted({datetime(ts.year, ts.month, 1) for ts in timestamps})
+    for month_start in months:
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {_partition_name(month_start)}
+                           PARTITION OF inventory_history_archive
+                           FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{_next_month(month_start):%Y-%m-%d}')''')
+    return len(months)
+
+
+def archive_history(conn, cutoff, batch_size=1000, max_batches=None):
+    """
+    cutoff 이전 이력을 아카이브로 이동
+
+    Args:
+        conn: autocommit이 꺼진 DB 연결
+        cutoff: 이 시각(한국시간, naive datetime) 이전 이력을 이동
+        batch_size: 한 트랜잭션에서 옮길 최대 행 수
+        max_batches: 최대 배치 수 (None이면 끝까지)
+
+    Returns:
+        moved: 이동한 행 수 (다른 프로세스가 작업 중이면 None)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (ARCHIVE_LOCK_KEY,))
+        locked = cursor.fetchone()[0]
+        conn.commit()
+        if not locked:
+            return None
+
+        try:
+            moved = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                # 짧은 트랜잭션으로 나누어 운영 중인 입출고 처리와 락 경합 최소화
+                # (modified_at, id) 인덱스 순서대로 읽으므로 배치마다 정렬/전체 스캔 없음
+                cursor.execute('''SELECT id, modified_at FROM inventory_history
+                                  WHERE modified_at < %s
+                                  ORDER BY modified_at, id
+                                  LIMIT %s
+                                  FOR UPDATE SKIP LOCKED''', (cutoff, batch_size))
+                rows = cursor.fetchall()
+                if rows:
+                    # 잠근 행의 월만 파티션 생성 후 같은 트랜잭션에서 이동
+                    _ensure_month_partitions(cursor, [row[1] for row in rows])
+                    cursor.execute(f'''
+                        WITH moved AS (
+                            DELETE FROM inventory_history
+                            WHERE id = ANY(%s)
+                            RETURNING {HISTORY_COLUMNS}
+                        )
+                        INSERT INTO inventory_history_archive ({HISTORY_COLUMNS})
+                        SELECT {HISTORY_COLUMNS} FROM moved
+                    ''', ([row[0] for row in rows],))
+                count = len(rows)
+                conn.commit()
+
+                moved += count
+                batches += 1
+                if count < batch_size:
+                    break
+            return moved
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (ARCHIVE_LOCK_KEY,))
+            conn.commit()
+    finally:
+        cursor.close()
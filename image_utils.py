@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+업로드 사진 압축
+JPEG는 목표 크기에 맞는 축소 배율로 디코딩(draft)해 전체 해상도 디코딩을 피하고,
+품질은 크기 예측값으로 범위를 좁혀 가며 찾아 인코딩 횟수를 최소화합니다.
+목록/갤러리용 작은 사본(썸네일, 중간 크기)은 이미 축소된 이미지에서 만들어 추가 디코딩이 없습니다.
+"""
+
+import io
+import math
+
+from PIL import Image, ImageOps
+
+MIN_QUALITY = 20
+# 품질 탐색 시 최대 추가 인코딩 횟수
+MAX_QUALITY_PROBES = 4
+# 목표 크기를 만족하는 품질과 초과하는 품질의 차이가 이 값 이하면 탐색 종료
+QUALITY_TOLERANCE = 2
+# 품질 1당 JPEG 크기 변화율(로그) 추정값 - 실측보다 약간 크게 잡아 첫 예측이 목표를 넘지 않게 함
+LOG_SIZE_PER_QUALITY = 0.03
+
+# 갤러리용 사본: 이름 -> (최대 가로 px, JPEG 품질)
+RENDITIONS = {
+    'thumb': (320, 70),
+    'medium': (640, 78),
+}
+
+# EXIF Orientation 5~8은 가로/세로가 바뀜
+_ORIENTATION_TAG = 0x0112
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def _encode_jpeg(img, quality, optimize=False):
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=optimize)
+    return output.getvalue()
+
+
+def _predict_quality(too_big, fits, target_bytes):
+    """
+    목표 크기에 맞을 품질 예측 (로그 크기가 품질에 대략 비례한다고 가정)
+
+    Args:
+        too_big: 목표를 넘은 (품질, 크기) 중 가장 낮은 품질
+        fits: 목표 이하인 (품질, 크기) 중 가장 높은 품질 (없으면 None)
+    """
+    big_quality, big_size = too_big
+    if fits:
+        fit_quality, fit_size = fits
+        if big_size > fit_size:
+            slope = (math.log(big_size) - math.log(fit_size)) / (big_quality - fit_quality)
+            return int(fit_quality + (math.log(target_bytes) - math.log(fit_size)) / slope)
+        return (fit_quality + big_quality) // 2
+    return int(big_quality - math.log(big_size / target_bytes) / LOG_SIZE_PER_QUALITY) - 1
+
+
+def open_for_resize(image_file, max_width):
+    """
+    이미지를 열고 방향 보정, 필요 시 축소 디코딩
+
+    JPEG는 draft 모드로 1/2, 1/4, 1/8 배율 디코딩을 요청해
+    max_width 이상인 가장 작은 크기로만 디코딩합니다.
+    """
+    img = Image.open(image_file)
+    if img.format == 'JPEG':
+        orientation = img.getexif().get(_ORIENTATION_TAG)
+        # 회전 후 가로가 될 축을 기준으로 배율 선택
+        if orientation in _TRANSPOSED_ORIENTATIONS:
+            requested = (1, max_width)
+        else:
+            requested = (max_width, 1)
+        img.draft('RGB', requested)
+    return ImageOps.exif_transpose(img)
+
+
+def to_rgb(img):
+    """JPEG 저장용 RGB 변환 (투명 배경은 흰색)"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def resize_to_width(img, max_width):
+    """비율을 유지하며 가로 max_width 이하로 축소"""
+    width, height = img.size
+    if width <= max_width:
+        return img
+    new_height = max(1, int(height * max_width / width))
+    return img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+
+
+def encode_to_target_size(img, max_size_bytes, quality=85):
+    """
+    목표 크기 이하가 되는 가장 높은 품질로 JPEG 인코딩
+
+    Returns:
+        (jpeg_bytes, quality, encodes): 인코딩 결과, 사용한 품질, 인코딩 횟수
+    """
+    # 대부분은 초기 품질로 충분하므로 최종 옵션(optimize)으로 바로 시도
+    data = _encode_jpeg(img, quality, optimize=True)
+    encodes = 1
+    if len(data) <= max_size_bytes or quality <= MIN_QUALITY:
+        return data, quality, encodes
+
+    too_big = (quality, len(data))
+    fits = None
+    low, high = MIN_QUALITY, quality - 1
+    for _ in range(MAX_QUALITY_PROBES):
+        if low > high:
+            break
+        probe = min(max(_predict_quality(too_big, fits, max_size_bytes), low), high)
+        size = len(_encode_jpeg(img, probe))
+        encodes += 1
+        if size <= max_size_bytes:
+            fits = (probe, size)
+            low = probe + 1
+        else:
+            too_big = (probe, size)
+            high = probe - 1
+        if fits and too_big[0] - fits[0] <= QUALITY_TOLERANCE:
+            break
+
+    # 탐색은 optimize 없이, 최종본만 optimize (허프만 최적화는 크기를 늘리지 않음)
+    final_quality = fits[0] if fits else MIN_QUALITY
+    data = _encode_jpeg(img, final_quality, optimize=True)
+    encodes += 1
+    return data, final_quality, encodes
+
+
+def build_renditions(img, renditions=RENDITIONS):
+    """
+    축소된 원본 이미지에서 작은 사본 JPEG 생성
+
+    원본보다 작지 않은 사본은 만들지 않습니다 (원본을 그대로 쓰면 됨).
+
+    Returns:
+        {이름: (jpeg_bytes, 가로 px)}
+    """
+    results = {}
+    for name, (width, quality) in sorted(renditions.items(), key=lambda item: -item[1][0]):
+        if img.size[0] <= width:
+            continue
+        # 큰 사본부터 만들고 다음 사본은 직전 사본에서 축소 (LANCZOS 연산량 감소)
+        img = resize_to_width(img, width)
+        results[name] = (_encode_jpeg(img, quality, optimize=True), img.size[0])
+    return results
+
+
+def compress_image_with_renditions(image_file, max_size_mb=1, max_width=800, quality=85, renditions=RENDITIONS):
+    """
+    compress_image_to_target_size와 같고, 갤러리용 작은 사본도 함께 생성
+
+    Returns:
+        (compressed_image_bytes, final_size_kb, rendition_images): rendition_images는 build_renditions() 결과
+        실패 시 (None, 0, {})
+    """
+    try:
+        img = open_for_resize(image_file, max_width)
+        img = resize_to_width(to_rgb(img), max_width)
+
+        compressed_bytes, final_quality, encodes = encode_to_target_size(
+            img, int(max_size_mb * 1024 * 1024), quality)
+        final_size_kb = len(compressed_bytes) / 1024
+        rendition_images = build_renditions(img, renditions) if renditions else {}
+
+        sizes = ', '.join(f"{name} {len(data) / 1024:.0f}KB" for name, (data, _) in rendition_images.items())
+        print(f"✅ 이미지 압축 완료: {final_size_kb:.1f}KB (품질: {final_quality}, 인코딩 {encodes}회)"
+              + (f" / 사본: {sizes}" if sizes else ''))
+
+        return compressed_bytes, final_size_kb, rendition_images
+
+    except Exception as e:
+        print(f"❌ 이미지 압축 오류: {e}")
+        return None, 0, {}
+
+
+def compress_image_to_target_size(image_file, max_size_mb=1, max_width=800, quality=85):
+    """
+    이미지를 목표 크기(MB) 이하로 압축하는 함수
+
+    Args:
+        image_file: 업로드된 이미지 파일
+        max_size_mb: 최대 파일 크기 (MB)
+        max_width: 최대 가로 크기 (픽셀)
+        quality: JPEG 초기(최대) 품질 (20-95)
+
+    Returns:
+        compressed_image_bytes: 압축된 이미지 바이트
+        final_size_kb: 최종 파일 크기 (KB)
+    """
+    compressed_bytes, final_size_kb, _ = compress_image_with_renditions(
+        image_file, max_size_mb, max_width, quality, renditions=None)
+    return compressed_bytes, final_size_kb
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+재고 일괄 등록
+업로드한 CSV/XLSX를 한 행씩 읽어 검증하고, 올바른 행을 COPY로 임시 테이블에 적재한 뒤
+집합 연산 한 번으로 inventory에 반영(있으면 수량 갱신, 없으면 추가)합니다.
+"""
+
+import codecs
+import csv
+import io
+import json
+import tempfile
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # openpyxl 미설치 시 XLSX 업로드만 비활성화
+    load_workbook = None
+
+from export_stream import unescape_formula
+
+# 헤더명 -> 필드명 (내보내기 파일의 한글 헤더와 영문 컬럼명 모두 허용)
+HEADER_ALIASES = {
+    '창고': 'warehouse', 'warehouse': 'warehouse',
+    '카테고리': 'category', 'category': 'category',
+    '부품명': 'part_name', 'part_name': 'part_name',
+    '수량': 'quantity', 'quantity': 'quantity',
+}
+
+IMPORT_MAX_ROWS = 20000
+PART_NAME_MAX_LENGTH = 200
+# 화면에 돌려줄 최대 오류 수
+MAX_REPORTED_ERRORS = 200
+
+
+class ImportFileError(Exception):
+    """파일 형식이나 헤더가 잘못되어 행 단위 검증을 진행할 수 없을 때 발생합니다."""
+
+
+def _detect_csv_encoding(stream, chunk_size=64 * 1024):
+    """
+    CSV 인코딩 판별 (UTF-8로 끝까지 읽히면 UTF-8, 아니면 엑셀 한글 기본값 cp949)
+    파일을 한 번 훑은 뒤 처음 위치로 되돌립니다.
+    """
+    start = stream.tell()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp949'
+    finally:
+        stream.seek(start)
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding=_detect_csv_encoding(stream), newline='')
+    try:
+        for row in csv.reader(text):
+            yield row
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f'CSV 파일을 읽을 수 없습니다. 엑셀에서 "CSV UTF-8" 형식으로 저장해 주세요. ({e})')
+    finally:
+        text.detach()
+
+
+def _read_xlsx(stream):
+    if load_workbook is None:
+        raise ImportFileError('openpyxl이 설치되어 있지 않아 XLSX 파일을 읽을 수 없습니다. CSV로 업로드해 주세요.')
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'XLSX 파일을 열 수 없습니다: {e}')
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def read_import_rows(filename, stream):
+    """
+    업로드 파일을 행 단위로 읽기
+
+    Yields:
+        (line_no, {'warehouse', 'category', 'part_name', 'quantity'}) - 값은 원본 그대로
+    """
+    lower_name = (filename or '').lower()
+    if lower_name.endswith('.csv'):
+        rows = _read_csv(stream)
+    elif lower_name.endswith('.xlsx'):
+        rows = _read_xlsx(stream)
+    else:
+        raise ImportFileError('CSV 또는 XLSX 파일만 업로드할 수 있습니다.')
+
+    header = None
+    for line_no, row in enumerate(rows, start=1):
+        if header is None:
+            header = [HEADER_ALIASES.get(str(cell).strip().lower(), HEADER_ALIASES.get(str(cell).strip()))
+                      for cell in row]
+            missing = {'part_name', 'quantity'} - set(header)
+            if missing:
+                raise ImportFileError('헤더에 부품명, 수량 열이 있어야 합니다. (선택: 창고, 카테고리)')
+            continue
+        if not any(str(cell).strip() for cell in row):
+            continue
+        record = {}
+        for field, cell in zip(header, row):
+            if field:
+                record[field] = cell
+        yield line_no, record
+
+
+def validate_import_rows(records, default_warehouse, default_category, warehouses, categories):
+    """
+    행 검증
+
+    Args:
+        records: read_import_rows() 결과
+        default_warehouse / default_category: 파일에 값이 없을 때 사용할 창고/카테고리
+        warehouses / categories: 허용 값 목록
+
+    Returns:
+        (valid, errors, total): valid는 (line_no, warehouse, category, part_name, quantity) 목록,
+                                errors는 {'line', 'message'} 목록
+    """
+    valid = []
+    errors = []
+    seen = {}
+    total = 0
+    for line_no, record in records:
+        total += 1
+        if total > IMPORT_MAX_ROWS:
+            raise ImportFileError(f'한 번에 최대 {IMPORT_MAX_ROWS}행까지 등록할 수 있습니다.')
+
+        # 재고 내보내기 CSV의 수식 방지용 ' 접두는 제거하고 비교
+        warehouse = unescape_formula(str(record.get('warehouse') or default_warehouse or '').strip())
+        category = unescape_formula(str(record.get('category') or default_category or '').strip())
+        part_name = unescape_formula(str(record.get('part_name') or '').strip())
+        raw_quantity = record.get('quantity')
+
+        problems = []
+        if warehouse not in warehouses:
+            problems.append(f"알 수 없는 창고 '{warehouse}'")
+        if category not in categories:
+            problems.append(f"알 수 없는 카테고리 '{category}'")
+        if not part_name:
+            problems.append('부품명이 비어 있음')
+        elif len(part_name) > PART_NAME_MAX_LENGTH:
+            problems.append(f'부품명이 {PART_NAME_MAX_LENGTH}자를 넘음')
+        try:
+            # 엑셀 숫자 셀은 float(예: 3.0)로 읽힘
+            if isinstance(raw_quantity, float) and raw_quantity.is_integer():
+                raw_quantity = int(raw_quantity)
+            quantity = int(str(raw_quantity).strip())
+            if quantity < 0:
+                problems.append('수량은 0 이상이어야 함')
+        except (TypeError, ValueError):
+            problems.append(f"수량 '{raw_quantity}'이(가) 정수가 아님")
+
+        key = (warehouse, category, part_name)
+        if not problems and key in seen:
+            problems.append(f'{seen[key]}행과 중복된 부품')
+
+        if problems:
+            errors.append({'line': line_no, 'message': ', '.join(problems)})
+            continue
+        seen[key] = line_no
+        valid.append((line_no, warehouse, category, part_name, quantity))
+    return valid, errors, total
+
+
+def build_copy_stream(valid_rows):
+    """COPY FROM STDIN (CSV 형식)용 바이트 스트림 (큰 파일은 디스크로 넘김)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in valid_rows:
+        writer.writerow(row)
+        spool.write(buffer.getvalue().encode('utf-8'))
+        buffer.seek(0)
+        buffer.truncate(0)
+    spool.seek(0)
+    return spool
+
+
+def apply_import(cursor, valid_rows, add_quantity, modifier_name, korea_time):
+    """
+    검증된 행을 inventory에 반영 (호출 측 트랜잭션 안에서 실행, 커밋은 호출 측에서)
+
+    같은 (창고, 카테고리, 부품명) 아이템이 있으면 수량을 갱신(add_quantity면 더하기)하고
+    변경량을 이력에 남기며, 없으면 새로 추가합니다.
+
+    Returns:
+        (updated, inserted, inserted_items): inserted_items는 [(id, part_name, warehouse, category)]
+    """
+    cursor.execute('''CREATE TEMP TABLE inventory_import (
+                          line_no INTEGER,
+                          warehouse TEXT,
+                          category TEXT,
+                          part_name TEXT,
+                          quantity INTEGER
+                      ) ON COMMIT DROP''')
+    with build_copy_stream(valid_rows) as stream:
+        cursor.execute('COPY inventory_import FROM STDIN WITH (FORMAT csv)', stream=stream)
+
+    # 일괄 반영 중 다른 요청이 같은 부품을 추가해 중복되지 않도록 재고 쓰기 차단 (읽기는 허용)
+    cursor.execute('LOCK TABLE inventory IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute('''
+        WITH matched AS (
+            SELECT DISTINCT ON (s.line_no) s.line_no, i.id, COALESCE(i.quantity, 0) AS old_quantity,
+                   s.quantity AS new_quantity
+            FROM inventory_import s
+            JOIN inventory i ON i.warehouse = s.warehouse AND i.category = s.category AND i.part_name = s.part_name
+            ORDER BY s.line_no, i.id
+        ), updated AS (
+            UPDATE inventory i
+            SET quantity = CASE WHEN %s::boolean THEN m.old_quantity + m.new_quantity ELSE m.new_quantity END,
+                last_modifier = %s, last_modified = %s::timestamp
+            FROM matched m
+            WHERE i.id = m.id
+            RETURNING i.id, i.quantity - m.old_quantity AS delta
+        ), history AS (
+            INSERT INTO inventory_history (inventory_id, change_type, quantity_change, modifier_name, modified_at)
+            SELECT id, CASE WHEN delta > 0 THEN 'in' ELSE 'out' END, delta, %s, %s::timestamp
+            FROM updated WHERE delta <> 0
+        ), inserted AS (
+            INSERT INTO inventory (warehouse, category, part_name, quantity, last_modifier, last_modified)
+            SELECT s.warehouse, s.category, s.part_name, s.quantity, %s, %s::timestamp
+            FROM inventory_import s
+            WHERE NOT EXISTS (SELECT 1 FROM inventory i
+                              WHERE i.warehouse = s.warehouse AND i.category = s.category AND i.part_name = s.part_name)
+            ORDER BY s.line_no
+            RETURNING id, part_name, warehouse, category
+        )
+        SELECT (SELECT COUNT(*) FROM updated),
+               (SELECT COUNT(*) FROM inserted),
+               (SELECT json_agg(json_build_array(id, part_name, warehouse, category)) FROM inserted)
+    ''', (add_quantity, modifier_name, korea_time, modifier_name, korea_time, modifier_name, korea_time))
+    updated, inserted, inserted_items = cursor.fetchone()
+    if isinstance(inserted_items, str):
+        inserted_items = json.loads(inserted_items)
+    return updated, inserted, [tuple(item) for item in inserted_items or []]
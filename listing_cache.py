@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+재고 목록 캐시
+(창고, 카테고리)별로 화면에 표시할 재고 목록을 프로세스 메모리에 보관합니다.
+크기 제한(LRU)과 유효 시간(TTL)이 있으며, 재고가 변경되면 해당 키만 무효화합니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ListingCache:
+    """
+    TTL + LRU 캐시
+
+    무효화 시 키별 세대(generation)를 올려, 무효화 이전에 조회를 시작한 요청이
+    오래된 결과를 다시 캐시에 넣지 못하도록 합니다.
+
+    Args:
+        max_entries: 보관할 최대 키 개수 (초과 시 가장 오래 사용하지 않은 키 제거)
+        ttl: 캐시 유효 시간 (초, 0이면 캐시 사용 안 함)
+    """
+
+    def __init__(self, max_entries=64, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def generation(self, key):
+        """조회 시작 전에 읽어 두었다가 set()에 전달할 현재 세대 값"""
+        with self._lock:
+            return (self._epoch, self._generations.get(key, 0))
+
+    def get(self, key):
+        """캐시된 값 반환 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return value
+
+    def set(self, key, value, generation):
+        """값 저장 (조회 도중 무효화되었다면 저장하지 않음)"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if (self._epoch, self._generations.get(key, 0)) != generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, key):
+        """특정 키 무효화"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._counters['invalidations'] += 1
+
+    def invalidate_where(self, predicate):
+        """조건에 맞는 키 모두 무효화 (예: 특정 창고 전체)"""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for key in keys:
+                del self._entries[key]
+            # 아직 캐시되지 않은 키를 조회 중인 요청도 저장하지 못하도록 전체 세대 증가
+            self._epoch += 1
+            self._counters['invalidations'] += len(keys)
+
+    def clear(self):
+        """전체 무효화"""
+        self.invalidate_where(lambda key: True)
+
+    def stats(self):
+        """모니터링용 캐시 통계"""
+        with self._lock:
+            stats = {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+            }
+            stats.update(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
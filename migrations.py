@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+데이터베이스 스키마 마이그레이션
+schema_version 테이블에 적용된 버전을 기록하고, 아직 적용되지 않은
+마이그레이션만 순서대로 실행합니다.
+
+마이그레이션은 (버전, 설명, 단계 목록) 형식이며 각 단계는 SQL 문자열이거나
+cursor를 인자로 받는 함수입니다. 한 마이그레이션은 하나의 트랜잭션으로 적용됩니다.
+"""
+
+import ast
+import json
+
+# 여러 워커가 동시에 마이그레이션하지 않도록 사용하는 advisory lock 키
+MIGRATION_LOCK_KEY = 7283001
+
+
+MIGRATIONS = [
+    (1, '기본 테이블 생성', [
+        '''CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            employee_id TEXT UNIQUE NOT NULL,
+            team TEXT NOT NULL,
+            password TEXT NOT NULL,
+            is_approved INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''',
+        '''CREATE TABLE IF NOT EXISTS inventory (
+            id SERIAL PRIMARY KEY,
+            warehouse TEXT NOT NULL,
+            category TEXT NOT NULL,
+            part_name TEXT NOT NULL,
+            quantity INTEGER DEFAULT 0,
+            last_modifier TEXT,
+            last_modified TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''',
+        '''CREATE TABLE IF NOT EXISTS inventory_history (
+            id SERIAL PRIMARY KEY,
+            inventory_id INTEGER REFERENCES inventory(id),
+            change_type TEXT,
+            quantity_change INTEGER,
+            modifier_name TEXT,
+            modified_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''',
+        '''CREATE TABLE IF NOT EXISTS photos (
+            id SERIAL PRIMARY KEY,
+            inventory_id INTEGER REFERENCES inventory(id),
+            filename TEXT NOT NULL,
+            original_name TEXT NOT NULL,
+            file_size INTEGER,
+            uploaded_by TEXT,
+            uploaded_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul'),
+            supabase_url TEXT
+        )''',
+        # 초기 버전으로 생성된 photos 테이블에는 supabase_url 컬럼이 없음
+        'ALTER TABLE photos ADD COLUMN IF NOT EXISTS supabase_url TEXT',
+        '''CREATE TABLE IF NOT EXISTS delivery_receipts (
+            id SERIAL PRIMARY KEY,
+            receipt_date DATE NOT NULL,
+            receipt_type TEXT NOT NULL,
+            items_data TEXT,
+            signature_data TEXT,
+            created_by TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''',
+    ]),
+    (2, '조회 경로 인덱스 추가', [
+        # 창고/카테고리별 재고 목록 (WHERE warehouse, category ORDER BY id)
+        'CREATE INDEX IF NOT EXISTS idx_inventory_warehouse_category ON inventory (warehouse, category, id)',
+        # 품목별 재고 이력 (WHERE inventory_id ORDER BY modified_at DESC)
+        'CREATE INDEX IF NOT EXISTS idx_inventory_history_item_time ON inventory_history (inventory_id, modified_at DESC, id DESC)',
+        # 품목별 사진 목록 및 사진 개수
+        'CREATE INDEX IF NOT EXISTS idx_photos_inventory ON photos (inventory_id, uploaded_at DESC)',
+        # 인수증 이력 정렬 (ORDER BY receipt_date DESC, created_at DESC)
+        'CREATE INDEX IF NOT EXISTS idx_delivery_receipts_date ON delivery_receipts (receipt_date DESC, created_at DESC, id DESC)',
+    ]),
+    (3, '인수증 창고 컬럼 및 JSONB 품목 컬럼 추가', [
+        'ALTER TABLE delivery_receipts ADD COLUMN IF NOT EXISTS warehouse TEXT',
+        'ALTER TABLE delivery_receipts ADD COLUMN IF NOT EXISTS items JSONB',
+        lambda cursor: _backfill_receipt_items(cursor),
+        lambda cursor: _assign_legacy_receipt_warehouses(cursor),
+        'CREATE INDEX IF NOT EXISTS idx_delivery_receipts_warehouse ON delivery_receipts (warehouse, receipt_date DESC, created_at DESC, id DESC)',
+    ]),
+    (4, '재고 사진 개수 컬럼 추가', [
+        'ALTER TABLE inventory ADD COLUMN IF NOT EXISTS photo_count INTEGER NOT NULL DEFAULT 0',
+        '''UPDATE inventory i SET photo_count = c.cnt
+           FROM (SELECT inventory_id, COUNT(*) AS cnt FROM photos GROUP BY inventory_id) c
+           WHERE c.inventory_id = i.id''',
+    ]),
+    (5, '재고 이력 아카이브 테이블 (월별 파티션)', [
+        '''CREATE TABLE IF NOT EXISTS inventory_history_archive (
+            id INTEGER NOT NULL,
+            inventory_id INTEGER,
+            change_type TEXT,
+            quantity_change INTEGER,
+            modifier_name TEXT,
+            modified_at TIMESTAMP
+        ) PARTITION BY RANGE (modified_at)''',
+        # 월별 파티션은 아카이브 작업 시 생성, 일시가 없는 행만 기본 파티션에 저장
+        'CREATE TABLE IF NOT EXISTS inventory_history_archive_default PARTITION OF inventory_history_archive DEFAULT',
+        'CREATE INDEX IF NOT EXISTS idx_inventory_history_archive_item_time ON inventory_history_archive (inventory_id, modified_at DESC, id DESC)',
+        # 보관 기간이 지난 이력을 오래된 순으로 일정 개수씩 옮길 때 사용
+        'CREATE INDEX IF NOT EXISTS idx_inventory_history_time ON inventory_history (modified_at, id)',
+    ]),
+    (6, '창고/카테고리별 재고 요약 테이블', [
+        '''CREATE TABLE IF NOT EXISTS inventory_summary (
+            warehouse TEXT NOT NULL,
+            category TEXT NOT NULL,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            total_quantity BIGINT NOT NULL DEFAULT 0,
+            last_changed TIMESTAMP,
+            PRIMARY KEY (warehouse, category)
+        )''',
+        '''INSERT INTO inventory_summary (warehouse, category, item_count, total_quantity, last_changed)
+           SELECT warehouse, category, COUNT(*), COALESCE(SUM(quantity), 0), MAX(last_modified)
+           FROM inventory
+           GROUP BY warehouse, category
+           ON CONFLICT (warehouse, category) DO NOTHING''',
+        # 재고 변경 시 요약 행을 직접 갱신하지 않고 변경분만 추가, 조회 시 요약에 합산
+        '''CREATE TABLE IF NOT EXISTS inventory_summary_deltas (
+            id BIGSERIAL PRIMARY KEY,
+            warehouse TEXT NOT NULL,
+            category TEXT NOT NULL,
+            item_delta INTEGER NOT NULL DEFAULT 0,
+            quantity_delta BIGINT NOT NULL DEFAULT 0,
+            changed_at TIMESTAMP
+        )''',
+    ]),
+    (7, '부품명 트라이그램 검색 인덱스', [
+        lambda cursor: _create_trigram_index(cursor),
+    ]),
+    (8, '사진 업로드 처리 작업 테이블', [
+        '''CREATE TABLE IF NOT EXISTS photo_jobs (
+            id TEXT PRIMARY KEY,
+            inventory_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            message TEXT,
+            original_name TEXT,
+            original_size INTEGER,
+            photo_id INTEGER,
+            file_size INTEGER,
+            supabase_url TEXT,
+            created_by TEXT,
+            created_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul'),
+            updated_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_photo_jobs_created_at ON photo_jobs (created_at)',
+    ]),
+    (9, '사진 썸네일/중간 크기 사본 컬럼 추가', [
+        'ALTER TABLE photos ADD COLUMN IF NOT EXISTS thumbnail_url TEXT',
+        'ALTER TABLE photos ADD COLUMN IF NOT EXISTS medium_url TEXT',
+    ]),
+]
+
+# 조회 경로가 의존하는 인덱스 (인덱스명: 테이블명)
+EXPECTED_INDEXES = {
+    'idx_inventory_warehouse_category': 'inventory',
+    'idx_inventory_history_item_time': 'inventory_history',
+    'idx_inventory_history_time': 'inventory_history',
+    'idx_photos_inventory': 'photos',
+    'idx_delivery_receipts_date': 'delivery_receipts',
+    'idx_delivery_receipts_warehouse': 'delivery_receipts',
+    'idx_inventory_history_archive_item_time': 'inventory_history_archive',
+    # pg_trgm을 사용할 수 없는 DB에서는 누락으로 표시됨 (검색은 파이썬 대체 방식으로 동작)
+    'idx_inventory_part_name_trgm': 'inventory',
+    'idx_photo_jobs_created_at': 'photo_jobs',
+}
+
+
+def _parse_receipt_items_data(items_data):
+    """
+    기존 items_data TEXT 파싱
+    save_receipt_with_details는 JSON을, 구 save_delivery_receipt는 str(list)를 저장했습니다.
+    """
+    try:
+        return json.loads(items_data)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return ast.literal_eval(items_data)
+    except (TypeError, ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _backfill_receipt_items(cursor):
+    """items_data TEXT에서 warehouse/items 컬럼 채우기"""
+    cursor.execute('SELECT id, items_data FROM delivery_receipts WHERE items IS NULL AND items_data IS NOT NULL')
+    rows = cursor.fetchall()
+    unparsed = 0
+    for receipt_id, items_data in rows:
+        parsed = _parse_receipt_items_data(items_data)
+        if parsed is None:
+            unparsed += 1
+            continue
+        warehouse = parsed.get('warehouse') if isinstance(parsed, dict) else None
+        cursor.execute('UPDATE delivery_receipts SET items = %s::jsonb, warehouse = COALESCE(warehouse, %s) WHERE id = %s',
+                       (json.dumps(parsed, ensure_ascii=False), warehouse, receipt_id))
+    if unparsed:
+        print(f"⚠️ 품목 데이터를 해석할 수 없는 인수증 {unparsed}건 (창고는 items_data 원문의 창고명으로 보정)")
+
+
+def _assign_legacy_receipt_warehouses(cursor):
+    """
+    창고가 비어 있는 인수증에 items_data 원문에 포함된 창고명을 지정
+    (기존 인수증 이력의 items_data LIKE '%창고명%' 조회와 같은 기준, 긴 이름 우선)
+    """
+    cursor.execute('''
+        UPDATE delivery_receipts d SET warehouse = m.warehouse
+        FROM (
+            SELECT DISTINCT ON (r.id) r.id, w.warehouse
+            FROM delivery_receipts r
+            JOIN (SELECT DISTINCT warehouse FROM inventory) w ON position(w.warehouse IN r.items_data) > 0
+            WHERE r.warehouse IS NULL
+            ORDER BY r.id, length(w.warehouse) DESC
+        ) m
+        WHERE d.id = m.id
+    ''')
+    assigned = cursor.rowcount
+    unassigned = count_unassigned_receipts(cursor)
+    print(f"✅ 기존 인수증 창고 보정: {assigned}건")
+    if unassigned:
+        print(f"⚠️ 창고를 알 수 없어 인수증 이력에 표시되지 않는 인수증 {unassigned}건 ('flask --app app db status'로 확인)")
+
+
+def count_unassigned_receipts(cursor):
+    """창고가 지정되지 않아 창고별 인수증 이력/내보내기에 나타나지 않는 인수증 수"""
+    cursor.execute('SELECT COUNT(*) FROM delivery_receipts WHERE warehouse IS NULL')
+    return cursor.fetchone()[0]
+
+
+def _create_trigram_index(cursor):
+    """
+    pg_trgm 확장과 부품명 GIN 인덱스 생성
+    확장을 만들 권한이 없으면 건너뛰고 마이그레이션은 계속 진행합니다.
+    """
+    cursor.execute('SAVEPOINT trigram_extension')
+    try:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except Exception as e:
+        cursor.execute('ROLLBACK TO SAVEPOINT trigram_extension')
+        print(f"⚠️ pg_trgm 확장을 만들 수 없어 트라이그램 인덱스를 건너뜁니다: {e}")
+        return
+    cursor.execute('RELEASE SAVEPOINT trigram_extension')
+    # part_search.PART_NAME_KEY_SQL과 같은 식이어야 인덱스가 사용됨
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_inventory_part_name_trgm ON inventory
+                      USING gin (lower(regexp_replace(part_name, '\\s+', '', 'g')) gin_trgm_ops)""")
+
+
+def latest_version():
+    """코드에 정의된 최신 스키마 버전"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn):
+    """
+    데이터베이스에 적용된 스키마 버전 조회 (쿼리 1회)
+    schema_version 테이블이 아직 없으면 0을 반환합니다.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        version = cursor.fetchone()[0]
+        conn.commit()
+        return version
+    except Exception:
+        conn.rollback()
+        return 0
+    finally:
+        cursor.close()
+
+
+def pending_migrations(current_version):
+    """current_version 이후에 적용해야 할 마이그레이션 목록"""
+    return [m for m in MIGRATIONS if m[0] > current_version]
+
+
+def apply_migrations(conn, target=None):
+    """
+    대기 중인 마이그레이션을 순서대로 적용
+
+    Args:
+        conn: autocommit이 꺼진 DB 연결
+        target: 이 버전까지만 적용 (None이면 최신 버전까지)
+
+    Returns:
+        applied: 적용된 (버전, 설명) 목록
+    """
+    applied = []
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'Asia/Seoul')
+        )''')
+        conn.commit()
+
+        # 다른 워커가 마이그레이션 중이면 끝날 때까지 대기
+        cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+        conn.commit()
+        try:
+            # 락을 얻은 뒤 버전을 다시 읽어 중복 적용 방지
+            cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+            current = cursor.fetchone()[0]
+            conn.commit()
+
+            for version, description, steps in pending_migrations(current):
+                if target is not None and version > target:
+                    break
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(cursor)
+                        else:
+                            cursor.execute(step)
+                    cursor.execute('INSERT INTO schema_version (version, description) VALUES (%s, %s)',
+                                   (version, description))
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    raise Exception(f"마이그레이션 {version} ({description}) 실패: {e}")
+                print(f"✅ 마이그레이션 {version} 적용: {description}")
+                applied.append((version, description))
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+            conn.commit()
+    finally:
+        cursor.close()
+
+    return applied
+
+
+def check_indexes(conn):
+    """
+    인덱스 점검
+
+    Returns:
+        report: {'missing': 누락된 인덱스명 목록,
+                 'unused': 통계 초기화 이후 한 번도 사용되지 않은 (인덱스명, 테이블명, 크기) 목록}
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        # 기본키/유니크 인덱스는 제약조건이므로 제외
+        cursor.execute('''
+            SELECT s.indexrelname, s.relname, pg_size_pretty(pg_relation_size(s.indexrelid))
+            FROM pg_stat_user_indexes s
+            JOIN pg_index i ON i.indexrelid = s.indexrelid
+            WHERE s.schemaname = current_schema()
+            AND s.idx_scan = 0
+            AND NOT i.indisunique
+            ORDER BY pg_relation_size(s.indexrelid) DESC
+        ''')
+        unused = [tuple(row) for row in cursor.fetchall()]
+        conn.commit()
+    finally:
+        cursor.close()
+
+    missing = [name for name in EXPECTED_INDEXES if name not in existing]
+    return {'missing': missing, 'unused': unused}
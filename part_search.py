@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+부품명 검색
+pg_trgm GIN 인덱스로 부분 일치와 오타가 섞인 검색어(유사도)를 함께 처리하고,
+유사도 순으로 정렬해 상위 결과만 반환합니다.
+pg_trgm 확장을 사용할 수 없는 DB에서는 파이썬(difflib)으로 같은 방식의 점수를 계산합니다.
+"""
+
+import re
+import threading
+from datetime import datetime
+from difflib import SequenceMatcher
+
+# 검색 비교용 부품명 정규화 식 (대소문자/공백 무시, 인덱스 식과 동일해야 함)
+PART_NAME_KEY_SQL = "lower(regexp_replace(i.part_name, '\\s+', '', 'g'))"
+
+SEARCH_COLUMNS = '''i.id, i.warehouse, i.category, i.part_name, i.quantity,
+                    i.last_modifier, i.last_modified, i.photo_count'''
+
+# 파이썬 대체 검색에서 결과로 인정할 최소 유사도 (pg_trgm 기본값과 동일)
+FALLBACK_MIN_SCORE = 0.3
+
+_trigram_lock = threading.Lock()
+_trigram_available = None
+
+
+def normalize_part_name(value):
+    """대소문자/공백을 무시하고 비교하기 위한 정규화"""
+    return re.sub(r'\s+', '', value or '').lower()
+
+
+def trigram_available(conn):
+    """pg_trgm 확장 설치 여부 (프로세스당 한 번만 확인)"""
+    global _trigram_available
+    if _trigram_available is not None:
+        return _trigram_available
+    with _trigram_lock:
+        if _trigram_available is None:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_available = cursor.fetchone() is not None
+            finally:
+                cursor.close()
+            if not _trigram_available:
+                print("⚠️ pg_trgm 확장이 없어 파이썬 대체 검색을 사용합니다.")
+    return _trigram_available
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fallback_score(key, name_key):
+    """부분 일치는 1.0, 그 외에는 difflib 유사도"""
+    if key in name_key:
+        return 1.0
+    return SequenceMatcher(None, key, name_key).ratio()
+
+
+def search_part_ids(conn, query, warehouse=None, limit=100):
+    """
+    부품명 검색
+
+    Args:
+        conn: DB 연결
+        query: 검색어
+        warehouse: 창고명 (None이면 전체 창고)
+        limit: 최대 결과 수
+
+    Returns:
+        item_ids: 부분 일치 우선, 유사도 높은 순 아이템 ID 목록
+    """
+    key = normalize_part_name(query)
+    if not key:
+        return []
+    cursor = conn.cursor()
+    try:
+        if trigram_available(conn):
+            # LIKE(부분 일치)와 %(유사도) 모두 GIN 트라이그램 인덱스를 사용
+            pattern = f'%{_escape_like(key)}%'
+            params = [pattern, key]
+            warehouse_clause = ''
+            if warehouse:
+                warehouse_clause = 'AND i.warehouse = %s'
+                params.append(warehouse)
+            cursor.execute(f'''
+                SELECT i.id
+                FROM inventory i
+                WHERE ({PART_NAME_KEY_SQL} LIKE %s OR {PART_NAME_KEY_SQL} %% %s)
+                {warehouse_clause}
+                ORDER BY ({PART_NAME_KEY_SQL} LIKE %s) DESC,
+                         similarity({PART_NAME_KEY_SQL}, %s) DESC,
+                         i.warehouse, i.category, i.part_name
+                LIMIT %s
+            ''', params + [pattern, key, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+        params = []
+        where = ''
+        if warehouse:
+            where = 'WHERE i.warehouse = %s'
+            params.append(warehouse)
+        cursor.execute(f'SELECT i.id, i.warehouse, i.category, i.part_name FROM inventory i {where}', params)
+        scored = []
+        for row in cursor.fetchall():
+            score = _fallback_score(key, normalize_part_name(row[3]))
+            if score >= FALLBACK_MIN_SCORE:
+                scored.append((-score, row[1], row[2], row[3], row[0]))
+        scored.sort()
+        return [entry[-1] for entry in scored[:limit]]
+    finally:
+        cursor.close()
+
+
+def fetch_parts_by_ids(conn, item_ids):
+    """ID 목록 순서대로 재고 행 조회"""
+    if not item_ids:
+        return []
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'SELECT {SEARCH_COLUMNS} FROM inventory i WHERE i.id = ANY(%s)', (list(item_ids),))
+        rows = {row[0]: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return [rows[item_id] for item_id in item_ids if item_id in rows]
+
+
+# 정렬 옵션: (정렬 식, 방향, 행에서 커서 값 위치, NULL 대체값)
+SORT_OPTIONS = {
+    'name': ('i.part_name', 'ASC', 3, ''),
+    'quantity': ('COALESCE(i.quantity, 0)', 'DESC', 4, 0),
+    'recent': ("COALESCE(i.last_modified, TIMESTAMP 'epoch')", 'DESC', 6, datetime(1970, 1, 1)),
+}
+
+
+def sort_cursor_values(sort, row):
+    """행의 (정렬 키, id) - 다음 페이지 커서용"""
+    _, _, position, default = SORT_OPTIONS[sort]
+    value = row[position]
+    return (default if value is None else value, row[0])
+
+
+def fetch_parts_page(conn, sort, after=None, per_page=50, warehouse=None, item_ids=None):
+    """
+    정렬 키 기준 키셋 페이지 조회
+
+    Args:
+        sort: SORT_OPTIONS의 키
+        after: 이전 페이지 마지막 행의 (정렬 키, id), 첫 페이지면 None
+        per_page: 페이지 크기 (다음 페이지 확인을 위해 1건 더 조회)
+        warehouse: 창고명 필터
+        item_ids: 검색 결과 ID로 제한 (None이면 제한 없음)
+
+    Returns:
+        rows: (id, warehouse, category, part_name, quantity, last_modifier, last_modified, photo_count)
+              목록, 최대 per_page + 1개
+    """
+    expression, order, _, _ = SORT_OPTIONS[sort]
+    conditions = []
+    params = []
+    if warehouse:
+        conditions.append('i.warehouse = %s')
+        params.append(warehouse)
+    if item_ids is not None:
+        conditions.append('i.id = ANY(%s)')
+        params.append(list(item_ids))
+    if after:
+        conditions.append(f"({expression}, i.id) {'>' if order == 'ASC' else '<'} (%s, %s)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''SELECT {SEARCH_COLUMNS} FROM inventory i {where}
+                           ORDER BY {expression} {order}, i.id {order}
+                           LIMIT %s''', params + [per_page + 1])
+        return cursor.fetchall()
+    finally:
+        cursor.close()
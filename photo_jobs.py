@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+사진 업로드 백그라운드 처리
+요청은 Werkzeug가 받아 둔 업로드 파일을 그대로 작업 큐에 넣고 바로 응답하며,
+압축/스토리지 업로드/DB 저장은 워커 스레드가 처리합니다.
+큐가 가득 차면 새 작업을 받지 않아(QueueFullError) 메모리와 디스크 사용량이 제한됩니다.
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+
+
+class QueueFullError(Exception):
+    """처리 대기 중인 작업이 너무 많아 새 작업을 받을 수 없을 때 발생합니다."""
+
+
+def detach_upload(file_storage):
+    """
+    업로드 파일 스트림을 복사 없이 넘겨받기
+
+    Werkzeug는 업로드를 작으면 메모리, 크면 임시 파일에 받아 두고
+    요청이 끝나면 request.files를 닫으므로, FileStorage에서 스트림을 분리해 닫히지 않게 합니다.
+
+    Returns:
+        (stream, size): 처음 위치로 되감은 스트림과 바이트 수 (사용 후 호출 측에서 닫아야 함)
+    """
+    stream = file_storage.stream
+    file_storage.stream = io.BytesIO()
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return stream, size
+
+
+class PhotoJobQueue:
+    """
+    고정 크기 큐와 워커 스레드 풀
+
+    Args:
+        handler: 작업(dict)을 처리하는 함수. 작업의 'file'은 처리 후 자동으로 닫힘
+        workers: 워커 스레드 수
+        max_queued: 처리 대기 가능한 최대 작업 수
+    """
+
+    def __init__(self, handler, workers=2, max_queued=20):
+        self._handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        # fork 이후에는 부모의 큐/스레드를 사용할 수 없으므로 새로 만듦
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._threads = []
+        self._active = 0
+        self._counters = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._total_seconds = 0.0
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_state()
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for _ in range(self.workers - len(self._threads)):
+                thread = threading.Thread(target=self._run, name='photo-worker', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job):
+        """
+        작업 추가 (기다리지 않음)
+
+        Raises:
+            QueueFullError: 큐가 가득 찬 경우. 이때 작업의 파일은 호출 측에서 닫아야 함
+        """
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise QueueFullError(f'사진 처리 대기 작업이 {self.max_queued}건을 넘었습니다.')
+        with self._lock:
+            self._counters['submitted'] += 1
+
+    def is_full(self):
+        """큐에 자리가 없는지 (작업 등록 전 빠른 확인용, 최종 판단은 submit)"""
+        return self._pid == os.getpid() and self._queue.full()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._active += 1
+            started = time.monotonic()
+            succeeded = False
+            try:
+                self._handler(job)
+                succeeded = True
+            except Exception as e:
+                print(f"❌ 사진 처리 작업 오류 ({job.get('id')}): {e}")
+            finally:
+                upload = job.get('file')
+                if upload is not None:
+                    upload.close()
+                with self._lock:
+                    self._active -= 1
+                    self._counters['completed' if succeeded else 'failed'] += 1
+                    self._total_seconds += time.monotonic() - started
+                self._queue.task_done()
+
+    def stats(self):
+        """큐 상태 (헬스체크용)"""
+        with self._lock:
+            finished = self._counters['completed'] + self._counters['failed']
+            return {
+                'workers': len([t for t in self._threads if t.is_alive()]),
+                'queued': self._queue.qsize(),
+                'max_queued': self.max_queued,
+                'active': self._active,
+                **self._counters,
+                'avg_seconds': round(self._total_seconds / finished, 3) if finished else None,
+            }
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Supabase Storage 클라이언트
+워커 프로세스마다 requests.Session 하나를 공유해 TCP/TLS 연결을 재사용하고,
+모든 요청에 연결/응답 제한 시간을 두며 5xx 응답과 연결 오류는 간격을 늘려 가며 재시도합니다.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 재시도할 서버 응답 코드
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class StorageClient:
+    """
+    Supabase Storage REST API 호출
+
+    업로드는 x-upsert로 보내므로 응답을 받지 못해 재시도해도 중복 오류가 나지 않습니다.
+
+    Args:
+        base_url: Supabase 프로젝트 URL
+        service_key: 서비스 키
+        pool_size: 호스트당 유지할 연결 수 (사진 워커 수 이상 권장)
+        connect_timeout / read_timeout: 연결/응답 대기 제한 시간 (초)
+        retries: 재시도 횟수 (5xx, 연결 오류, 응답 시간 초과)
+        backoff: 재시도 대기 간격 계수 (backoff, 2*backoff, 4*backoff ... 초)
+    """
+
+    def __init__(self, base_url, service_key, pool_size=10, connect_timeout=3.05, read_timeout=30,
+                 retries=3, backoff=0.5):
+        self.base_url = (base_url or '').rstrip('/')
+        self._service_key = service_key
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._counters = {'requests': 0, 'errors': 0, 'retries': 0}
+        self._latency = {}
+
+    @property
+    def enabled(self):
+        return bool(self.base_url and self._service_key)
+
+    def _get_session(self):
+        # fork 이후 부모 프로세스의 연결(소켓)을 공유하지 않도록 프로세스마다 새 세션 생성
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=self.retries,
+                    status=self.retries,
+                    status_forcelist=RETRY_STATUS_CODES,
+                    allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+                    backoff_factor=self.backoff,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Authorization'] = f'Bearer {self._service_key}'
+                self._session = session
+                self._pid = os.getpid()
+            return self._session
+
+    def _request(self, operation, method, url, **kwargs):
+        """요청 실행 및 지연 시간/오류 기록 (재시도 후에도 실패한 연결 오류는 예외로 전달)"""
+        started = time.monotonic()
+        response = None
+        try:
+            response = self._get_session().request(method, url, timeout=self.timeout, **kwargs)
+            return response
+        finally:
+            elapsed = time.monotonic() - started
+            retried = 0
+            if response is not None and getattr(response.raw, 'retries', None) is not None:
+                retried = len(response.raw.retries.history)
+            with self._lock:
+                self._counters['requests'] += 1
+                self._counters['retries'] += retried
+                if response is None or response.status_code >= 400:
+                    self._counters['errors'] += 1
+                latency = self._latency.setdefault(operation, {'count': 0, 'total': 0.0, 'max': 0.0})
+                latency['count'] += 1
+                latency['total'] += elapsed
+                latency['max'] = max(latency['max'], elapsed)
+
+    def object_url(self, bucket, filename):
+        return f"{self.base_url}/storage/v1/object/{bucket}/{filename}"
+
+    def public_url(self, bucket, filename):
+        return f"{self.base_url}/storage/v1/object/public/{bucket}/{filename}"
+
+    def upload(self, bucket, filename, data, content_type='image/jpeg'):
+        """파일 업로드 (같은 이름이 있으면 덮어씀) - 성공 시 응답, 실패 시 예외 없이 응답 반환"""
+        return self._request('upload', 'POST', self.object_url(bucket, filename), data=data,
+                             headers={'Content-Type': content_type, 'x-upsert': 'true'})
+
+    def delete(self, bucket, filenames):
+        """파일 일괄 삭제 (요청 1회)"""
+        return self._request('delete', 'DELETE', f"{self.base_url}/storage/v1/object/{bucket}",
+                             json={'prefixes': list(filenames)})
+
+    def download(self, url):
+        """공개 URL의 파일 내려받기"""
+        response = self._request('download', 'GET', url)
+        response.raise_for_status()
+        return response.content
+
+    def stats(self):
+        """요청 수, 오류/재시도 수, 작업별 평균/최대 지연 시간(ms) (헬스체크용)"""
+        with self._lock:
+            return {
+                **self._counters,
+                'pool_size': self.pool_size,
+                'timeout': {'connect': self.timeout[0], 'read': self.timeout[1]},
+                'latency_ms': {
+                    operation: {
+                        'count': latency['count'],
+                        'avg': round(latency['total'] / latency['count'] * 1000, 1),
+                        'max': round(latency['max'] * 1000, 1),
+                    }
+                    for operation, latency in self._latency.items()
+                },
+            }
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""재고 일괄 등록 파일 읽기/검증 테스트"""
+
+import io
+
+import pytest
+
+from export_stream import stream_csv
+from inventory_import import ImportFileError, read_import_rows, validate_import_rows
+
+WAREHOUSES = ['전기창고']
+CATEGORIES = ['배터리']
+
+
+def validate(filename, data):
+    records = read_import_rows(filename, io.BytesIO(data))
+    return validate_import_rows(records, '전기창고', '배터리', WAREHOUSES, CATEGORIES)
+
+
+def test_cp949_csv_from_excel():
+    data = '부품명,수량\r\n납축전지 12V,3\r\n'.encode('cp949')
+    valid, errors, total = validate('재고.csv', data)
+    assert errors == []
+    assert valid == [(2, '전기창고', '배터리', '납축전지 12V', 3)]
+
+
+def test_undecodable_csv_is_import_error():
+    data = '부품명,수량\r\n'.encode('utf-8') + b'\xff\xfe\xff,1\r\n'
+    with pytest.raises(ImportFileError):
+        validate('재고.csv', data)
+
+
+def test_exported_csv_round_trip():
+    rows = [('전기창고', '배터리', '+12V 배터리', 5), ('전기창고', '배터리', '-극 단자', 2)]
+    data = b''.join(stream_csv(['창고', '카테고리', '부품명', '수량'], [rows]))
+    valid, errors, total = validate('재고.csv', data)
+    assert errors == []
+    assert [row[1:] for row in valid] == rows